@@ -3,23 +3,56 @@ Affiliate Link Scanner for TruthSignal
 Detects affiliate marketing links from major networks in HTML content
 """
 
+import os
 import re
 import logging
-from typing import Dict, List, Set
-from urllib.parse import urlparse, parse_qs
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try to import Hyperscan, but provide fallback
+try:
+    import hyperscan
+
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Try to import RE2 (linear-time C++ engine) for the combined pattern, but provide fallback
+try:
+    import re2
+
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Remainder of a matched URL up to the end of its attribute value
+_URL_TAIL = r'[^"\'\s<>]*'
+
 
 class AffiliateScanner:
     """
     Scans HTML content for affiliate marketing links from major networks
     """
 
+    # Known CJ Affiliate click-tracking domains
+    CJ_DOMAINS = (
+        'anrdoezrs.net',
+        'dpbolvw.net',
+        'tkqlhce.com',
+        'jdoqocy.com',
+        'kqzyfj.com'
+    )
+
+    # Trailing bytes kept while stream scanning, bounds the length of a recoverable URL
+    MAX_URL_LENGTH = 4096
+
     def __init__(self):
-        # Compile regex patterns for better performance
+        # Compile regex patterns for better performance; compiled objects are cached
+        # per process, so additional scanners reuse them instead of recompiling
         self.patterns = {
             'amazon': self._compile_amazon_patterns(),
             'shareasale': self._compile_shareasale_patterns(),
@@ -33,153 +66,357 @@ class AffiliateScanner:
             'cj_affiliate': 'CJ Affiliate'
         }
 
-    def _compile_amazon_patterns(self) -> List[re.Pattern]:
-        """Compile Amazon Associates detection patterns"""
+        # Literal substrings every affiliate URL contains, checked before any regex runs
+        self._literal_anchors = tuple(
+            anchor.encode('ascii') for anchor in ('amazon.', 'amzn.to/', 'shareasale.com') + self.CJ_DOMAINS
+        )
+
+        # Single alternation so the HTML is scanned once, one named group per network
+        alternation = '|'.join(
+            f"(?P<{network}>{'|'.join(pattern.pattern for pattern in patterns)})"
+            for network, patterns in self.patterns.items()
+        )
+        self._combined = self._compile_combined_pattern(f'(?:{alternation}){_URL_TAIL}'.encode('ascii'))
+
+        # Maps match.lastgroup back to the (network, display name) of the group that matched
+        self._group_networks = {
+            network: (network, self.network_names[network]) for network in self.patterns
+        }
+
+        # Hyperscan databases matching every pattern in one pass over the HTML
+        self._hs_database, self._hs_networks = self._compile_hyperscan_database()
+        self._hs_stream_database, _ = self._compile_hyperscan_database(streaming=True)
+
+        # Hyperscan scratch space cannot be shared by concurrent scans, keep one per thread
+        self._thread_local = threading.local()
+
+    @classmethod
+    @cache
+    def _compile_amazon_patterns(cls) -> List[re.Pattern]:
+        """Compile Amazon Associates detection patterns (matched against lower-cased input)"""
         return [
             # tag parameter in query string
             re.compile(
-                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn|in)/[^"\']*[?&](?:tag|associate-tag)=[a-zA-Z0-9_-]+',
-                re.IGNORECASE),
+                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn|in)/[^"\'\s<>]*[?&](?:tag|associate-tag)=[a-zA-Z0-9_-]+'),
             # gp/product with affiliate structure
             re.compile(
-                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn)/gp/product/[^"\']*/ref=[^"\']*\?[^"\']*tag=[a-zA-Z0-9_-]+',
-                re.IGNORECASE),
+                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn)/gp/product/[^"\'\s<>]*/ref=[^"\'\s<>]*\?[^"\'\s<>]*tag=[a-zA-Z0-9_-]+'),
             # dp with affiliate structure
             re.compile(
-                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn)/[^"\']*/dp/[^"\']*/ref=[^"\']*\?[^"\']*tag=[a-zA-Z0-9_-]+',
-                re.IGNORECASE),
+                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn)/[^"\'\s<>]*/dp/[^"\'\s<>]*/ref=[^"\'\s<>]*\?[^"\'\s<>]*tag=[a-zA-Z0-9_-]+'),
             # amzn.to short links (common affiliate shorteners)
-            re.compile(r'https?://amzn\.to/[a-zA-Z0-9]+', re.IGNORECASE)
+            re.compile(r'https?://amzn\.to/[a-zA-Z0-9]+')
         ]
 
-    def _compile_shareasale_patterns(self) -> List[re.Pattern]:
+    @classmethod
+    @cache
+    def _compile_shareasale_patterns(cls) -> List[re.Pattern]:
         """Compile ShareASale detection patterns"""
         return [
             # shareasale.com with r parameter
-            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\']*[?&]r=[0-9]+', re.IGNORECASE),
+            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\'\s<>]*[?&]r=[0-9]+'),
             # shareasale.com with merchant ID patterns
-            re.compile(r'https?://(?:www\.)?shareasale\.com/r\.cfm\?[^"\']*(?:merchantID|m)=[0-9]+', re.IGNORECASE),
-            # shareasale.com affiliate links
-            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\']*\?(?:[^"\']*&)*[a-zA-Z]+=[0-9]+', re.IGNORECASE)
+            re.compile(r'https?://(?:www\.)?shareasale\.com/r\.cfm\?[^"\'\s<>]*(?:merchantid|m)=[0-9]+'),
+            # shareasale.com affiliate links (no nested quantifiers, so no catastrophic backtracking)
+            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\'?\s<>]*\?(?:[^"\'\s<>]*&)?[a-zA-Z]+=[0-9]+')
         ]
 
-    def _compile_cj_affiliate_patterns(self) -> List[re.Pattern]:
+    @classmethod
+    @cache
+    def _compile_cj_affiliate_patterns(cls) -> List[re.Pattern]:
         """Compile CJ Affiliate detection patterns"""
-        cj_domains = [
-            'anrdoezrs.net',
-            'dpbolvw.net',
-            'tkqlhce.com',
-            'jdoqocy.com',
-            'kqzyfj.com'
+        # Match any URL from known CJ Affiliate domains with one shared-prefix alternation
+        domains = '|'.join(re.escape(domain) for domain in cls.CJ_DOMAINS)
+        return [
+            re.compile(rf'https?://(?:www\.)?(?:{domains})/[\w/\.-]+')
         ]
 
-        patterns = []
-        for domain in cj_domains:
-            # Match any URL from known CJ Affiliate domains
-            patterns.append(
-                re.compile(rf'https?://(?:www\.)?{re.escape(domain)}/[\w/\.-]+', re.IGNORECASE)
+    @staticmethod
+    @cache
+    def _compile_combined_pattern(source: bytes):
+        """Compile the combined pattern with RE2 when available, otherwise with re"""
+        if RE2_AVAILABLE:
+            try:
+                return re2.compile(source)
+            except re2.error as e:
+                logger.warning(f"RE2 compilation failed, using re module: {e}")
+
+        return re.compile(source)
+
+    def _compile_hyperscan_database(self, streaming: bool = False):
+        """Compile all network patterns into a single Hyperscan block-mode (or stream-mode) database"""
+        if not HYPERSCAN_AVAILABLE:
+            return None, []
+
+        expressions = []
+        networks = []
+        for network, patterns in self.patterns.items():
+            for pattern in patterns:
+                expressions.append((pattern.pattern + _URL_TAIL).encode('utf-8'))
+                networks.append((network, self.network_names[network]))
+
+        database = self._compile_hyperscan_expressions(tuple(expressions), streaming)
+        return database, (networks if database is not None else [])
+
+    @staticmethod
+    @cache
+    def _compile_hyperscan_expressions(expressions: Tuple[bytes, ...], streaming: bool):
+        """Compile Hyperscan expressions, ids are the expression indexes"""
+        try:
+            if streaming:
+                # Start-of-match offsets across chunk boundaries need the large SOM horizon
+                mode = hyperscan.HS_MODE_STREAM | hyperscan.HS_MODE_SOM_HORIZON_LARGE
+            else:
+                mode = hyperscan.HS_MODE_BLOCK
+            database = hyperscan.Database(mode=mode)
+            database.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(expressions)
             )
+        except hyperscan.error as e:
+            logger.warning(f"Hyperscan compilation failed, using regex matching: {e}")
+            return None
 
-        return patterns
+        return database
 
-    def _extract_links_from_html(self, html_content: str) -> List[str]:
+    def _scan_with_hyperscan(self, html_bytes: bytes) -> Iterator[Tuple[Tuple[str, str], bytes]]:
         """
-        Extract all href URLs from HTML content
+        Match all affiliate patterns against the raw HTML in a single Hyperscan pass
         """
-        try:
-            # Simple href extraction pattern
-            href_pattern = re.compile(r'href=[\'"]([^\'"]+)[\'"]', re.IGNORECASE)
-            links = href_pattern.findall(html_content)
+        spans = {}
 
-            # Also look for src attributes that might contain affiliate URLs
-            src_pattern = re.compile(r'src=[\'"]([^\'"]+)[\'"]', re.IGNORECASE)
-            src_links = src_pattern.findall(html_content)
+        def on_match(pattern_id, start, end, flags, context):
+            # Hyperscan reports every end offset, keep the longest match per start
+            current = spans.get(start)
+            if current is None or end > current[1]:
+                spans[start] = (pattern_id, end)
 
-            return list(set(links + src_links))  # Remove duplicates
+        scratch = getattr(self._thread_local, 'hs_scratch', None)
+        if scratch is None:
+            scratch = self._thread_local.hs_scratch = hyperscan.Scratch(self._hs_database)
 
-        except Exception as e:
-            logger.error(f"Error extracting links from HTML: {e}")
-            return []
+        self._hs_database.scan(html_bytes, match_event_handler=on_match, scratch=scratch)
 
-    def _is_affiliate_link(self, url: str) -> Dict[str, str]:
+        return (
+            (self._hs_networks[pattern_id], html_bytes[start:end])
+            for start, pattern_id, end in self._outermost_spans(spans)
+        )
+
+    def _scan_stream_with_hyperscan(
+            self, chunks: Iterable[Union[str, bytes]]) -> Iterator[Tuple[Tuple[str, str], bytes]]:
         """
-        Check if a URL matches any affiliate network patterns
-        Returns dict with network name if found, empty dict otherwise
+        Match all affiliate patterns against HTML chunks as they arrive, keeping
+        only the last MAX_URL_LENGTH bytes needed to recover matched URLs
         """
-        try:
-            # Normalize URL for better matching
-            normalized_url = url.strip()
-
-            for network, patterns in self.patterns.items():
-                for pattern in patterns:
-                    if pattern.search(normalized_url):
-                        return {
-                            'network': network,
-                            'display_name': self.network_names[network],
-                            'url': normalized_url
-                        }
-
-            return {}
-
-        except Exception as e:
-            logger.error(f"Error checking affiliate link {url}: {e}")
-            return {}
+        spans = {}
+        touched = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            # Hyperscan reports every end offset, keep the longest match per start
+            current = spans.get(start)
+            if current is None or end > current[1]:
+                spans[start] = (pattern_id, end)
+                touched.add(start)
+
+        urls = {}
+        window = b''
+        window_start = 0
+
+        def collect_urls():
+            for start in touched:
+                if start >= window_start:
+                    end = spans[start][1]
+                    urls[start] = window[start - window_start:end - window_start]
+            touched.clear()
+
+        with self._hs_stream_database.stream(match_event_handler=on_match) as stream:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8', 'replace')
+                window += chunk
+                stream.scan(chunk)
+                collect_urls()
+
+                if len(window) > self.MAX_URL_LENGTH:
+                    window_start += len(window) - self.MAX_URL_LENGTH
+                    window = window[-self.MAX_URL_LENGTH:]
+
+        # Closing the stream can report matches that end at the end of the data
+        collect_urls()
+
+        return (
+            (self._hs_networks[pattern_id], urls[start])
+            for start, pattern_id, _ in self._outermost_spans({start: spans[start] for start in urls})
+        )
+
+    @staticmethod
+    def _outermost_spans(spans: Dict[int, Tuple[int, int]]) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, pattern_id, end) in order, dropping matches nested inside an earlier one as finditer would"""
+        last_end = 0
+        for start, (pattern_id, end) in sorted(spans.items()):
+            if start < last_end:
+                continue
+            last_end = end
+            yield start, pattern_id, end
+
+    def _scan_with_regex(self, html_bytes: bytes, html_lower: bytes) -> Iterator[Tuple[Tuple[str, str], bytes]]:
+        """
+        Match the combined affiliate regex directly against the raw HTML
 
-    def find_affiliate_links(self, html_content: str) -> Dict:
+        Matching runs on the lower-cased copy, URLs are sliced from the original
+        so their casing is preserved.
+        """
+        group_networks = self._group_networks
+        return (
+            (group_networks[match.lastgroup], html_bytes[match.start():match.end()])
+            for match in self._combined.finditer(html_lower)
+        )
+
+    def _build_affiliate_links(self, matches: Iterable[Tuple[Tuple[str, str], bytes]]) -> List[Dict[str, str]]:
+        """Build affiliate link records from ((network, display name), url) matches, skipping duplicate URLs"""
+        affiliate_links = []
+        seen = set()
+        for (network, display_name), url in matches:
+            if url in seen:
+                continue
+            seen.add(url)
+
+            affiliate_links.append({
+                'network': network,
+                'display_name': display_name,
+                'url': url.decode('utf-8', 'replace')
+            })
+
+        return affiliate_links
+
+    def find_affiliate_links(self, html_content: str, include_debug: bool = False) -> Dict:
         """
         Main function to find affiliate links in HTML content
 
         Args:
-            html_content (str): HTML content as string
+            html_content (str | bytes): HTML content as string or UTF-8 bytes
+            include_debug (bool): Also return every matched link as 'all_affiliate_links'
 
         Returns:
             dict: Analysis results with affiliate link information
         """
         try:
-            if not html_content or not isinstance(html_content, str):
+            if not html_content or not isinstance(html_content, (str, bytes)):
                 logger.warning("Invalid HTML content provided")
-                return self._empty_result()
+                return self._empty_result(include_debug)
+
+            # The patterns are ASCII, so scan UTF-8 bytes; bytes.lower() keeps offsets aligned
+            if isinstance(html_content, str):
+                html_bytes = html_content.encode('utf-8', 'replace')
+            else:
+                html_bytes = html_content
+            html_lower = html_bytes.lower()
+
+            # Most pages contain no affiliate domain at all, skip the regex work for them
+            if not any(anchor in html_lower for anchor in self._literal_anchors):
+                return self._empty_result(include_debug)
+
+            # Single pass over the raw HTML, no link extraction needed
+            if self._hs_database is not None:
+                matches = self._scan_with_hyperscan(html_bytes)
+            else:
+                matches = self._scan_with_regex(html_bytes, html_lower)
 
-            # Extract all links from HTML
-            all_links = self._extract_links_from_html(html_content)
+            return self._summarize_matches(matches, include_debug)
 
-            if not all_links:
-                return self._empty_result()
+        except Exception as e:
+            logger.error(f"Error in find_affiliate_links: {e}")
+            return self._error_result(str(e))
 
-            # Check each link for affiliate patterns
-            affiliate_links = []
-            detected_networks = set()
+    def find_affiliate_links_in_stream(self, chunks: Iterable[Union[str, bytes]],
+                                       include_debug: bool = False) -> Dict:
+        """
+        Find affiliate links in HTML delivered in chunks, e.g. while it is downloaded
+
+        With Hyperscan the chunks are matched as they arrive, so memory stays
+        bounded by the chunk size instead of the page size. Without it the
+        chunks are joined and scanned with find_affiliate_links.
 
-            for link in all_links:
-                result = self._is_affiliate_link(link)
-                if result:
-                    affiliate_links.append(result)
-                    detected_networks.add(result['network'])
+        Args:
+            chunks: Iterable of HTML chunks as strings or UTF-8 bytes
+            include_debug (bool): Also return every matched link as 'all_affiliate_links'
 
-            # Prepare results
-            unique_links = self._get_unique_links(affiliate_links)
-            sample_links = self._get_sample_urls(unique_links)
+        Returns:
+            dict: Analysis results with affiliate link information
+        """
+        if self._hs_stream_database is None:
+            data = b''.join(
+                chunk.encode('utf-8', 'replace') if isinstance(chunk, str) else chunk
+                for chunk in chunks
+            )
+            return self.find_affiliate_links(data, include_debug=include_debug)
 
-            return {
-                'affiliate_links_found': len(affiliate_links) > 0,
-                'affiliate_networks': [self.network_names[net] for net in detected_networks],
-                'total_affiliate_links': len(affiliate_links),
-                'unique_affiliate_links': len(unique_links),
-                'details': sample_links,
-                'all_affiliate_links': affiliate_links  # Full list for debugging
-            }
+        try:
+            return self._summarize_matches(self._scan_stream_with_hyperscan(chunks), include_debug)
 
         except Exception as e:
-            logger.error(f"Error in find_affiliate_links: {e}")
+            logger.error(f"Error in find_affiliate_links_in_stream: {e}")
             return self._error_result(str(e))
 
-    def _get_unique_links(self, affiliate_links: List[Dict]) -> Set[str]:
-        """Get unique affiliate URLs"""
-        return set(link['url'] for link in affiliate_links)
+    def scan_batch(self, html_documents: List[str], max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        Find affiliate links in many HTML documents
+
+        Hyperscan and RE2 release the GIL while matching, so with either engine
+        the documents are scanned on a thread pool. With the re module threads
+        would only serialize, so documents are scanned one after another.
+
+        Args:
+            html_documents: HTML documents as strings or UTF-8 bytes
+            max_workers: Thread pool size, defaults to the CPU count
+
+        Returns:
+            list: One find_affiliate_links result per document, in input order
+        """
+        releases_gil = self._hs_database is not None or not isinstance(self._combined, re.Pattern)
+        if not releases_gil or len(html_documents) < 2:
+            return [self.find_affiliate_links(html) for html in html_documents]
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return list(executor.map(self.find_affiliate_links, html_documents))
+
+    def _summarize_matches(self, matches: Iterable[Tuple[Tuple[str, str], bytes]],
+                           include_debug: bool) -> Dict:
+        """Build the analysis result from ((network, display name), url) matches"""
+        if include_debug:
+            affiliate_links = self._build_affiliate_links(matches)
+            matches = (
+                ((link['network'], link['display_name']), link['url'].encode('utf-8'))
+                for link in affiliate_links
+            )
+
+        # Only counts and samples are needed, so keep just the networks and unique URLs;
+        # URLs stay as bytes and only the samples are decoded
+        detected_networks = set()
+        unique_links = set()
+        for entry, url in matches:
+            detected_networks.add(entry)
+            unique_links.add(url)
+
+        sample_links = self._get_sample_urls(unique_links)
+
+        result = {
+            'affiliate_links_found': len(unique_links) > 0,
+            'affiliate_networks': [display_name for _, display_name in detected_networks],
+            'total_affiliate_links': len(unique_links),
+            'unique_affiliate_links': len(unique_links),
+            'details': sample_links
+        }
+        if include_debug:
+            result['all_affiliate_links'] = affiliate_links  # Full list for debugging
+
+        return result
 
-    def _get_sample_urls(self, unique_links: Set[str], max_samples: int = 5) -> List[str]:
+    def _get_sample_urls(self, unique_links: Set[bytes], max_samples: int = 5) -> List[str]:
         """Get sample URLs for the result details"""
-        sample_list = list(unique_links)[:max_samples]
+        sample_list = [url.decode('utf-8', 'replace') for url in list(unique_links)[:max_samples]]
 
         # Truncate long URLs for readability
         truncated_samples = []
@@ -191,16 +428,18 @@ class AffiliateScanner:
 
         return truncated_samples
 
-    def _empty_result(self) -> Dict:
-        """Return empty result structure"""
-        return {
+    def _empty_result(self, include_debug: bool = False) -> Dict:
+        """Return empty result structure, shaped like _summarize_matches"""
+        result = {
             'affiliate_links_found': False,
             'affiliate_networks': [],
             'total_affiliate_links': 0,
             'unique_affiliate_links': 0,
-            'details': [],
-            'all_affiliate_links': []
+            'details': []
         }
+        if include_debug:
+            result['all_affiliate_links'] = []
+        return result
 
     def _error_result(self, error_message: str) -> Dict:
         """Return error result structure"""
@@ -209,6 +448,10 @@ class AffiliateScanner:
         return result
 
 
+# Shared scanner so patterns are compiled once per process, not once per call
+_SCANNER = AffiliateScanner()
+
+
 # Module-level function for easy import and use
 def find_affiliate_links(html_content: str) -> dict:
     """
@@ -224,8 +467,7 @@ def find_affiliate_links(html_content: str) -> dict:
             - total_affiliate_links (int): Count of affiliate links found
             - details (list): Sample of found affiliate URLs (max 5)
     """
-    scanner = AffiliateScanner()
-    result = scanner.find_affiliate_links(html_content)
+    result = _SCANNER.find_affiliate_links(html_content, include_debug=False)
 
     # Return only the specified fields in the public API
     return {
@@ -6,10 +6,13 @@ With fallback support for external libraries
 
 import re
 import logging
-from typing import Dict, List, Set, Optional
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import accumulate, islice
+from typing import Collection, Dict, Iterable, Iterator, List, Set, Optional, Tuple
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Try to import BeautifulSoup, but provide fallback
@@ -22,6 +25,14 @@ except ImportError:
     BEAUTIFUL_SOUP_AVAILABLE = False
     logger.warning("BeautifulSoup not available - using regex fallback for HTML parsing")
 
+# Try to import selectolax (C-backed HTML parser), but provide fallback
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
 try:
     import urllib3
 
@@ -29,30 +40,112 @@ try:
 except ImportError:
     URLLIB3_AVAILABLE = False
 
+# Try to import RE2 (linear-time C++ engine) for the union pattern, but provide fallback
+try:
+    import re2
+
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Try to import Hyperscan for multi-pattern scanning of whole documents, but provide fallback
+try:
+    import hyperscan
+
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# URL-bearing attributes, matched in a single pass over the HTML
+_ATTR_RE = re.compile(r'(?:href|src|action)\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_ATTR_BYTES_RE = re.compile(_ATTR_RE.pattern.encode('ascii'), re.IGNORECASE)
+
+# HTML entities for '&' that appear in attribute-encoded URLs
+_ENTITY_RE = re.compile(r'&(?:amp|#38|#x26);')
+_ENTITY_BYTES_RE = re.compile(_ENTITY_RE.pattern.encode('ascii'), re.IGNORECASE)
+
+# Remainder of a matched URL up to the end of its attribute value
+_URL_TAIL = r'[^"\'\s<>]*'
+
 
 class AffiliateScanner:
     """
     Scans HTML content for affiliate marketing links from major networks
     """
 
-    def __init__(self, use_advanced_parsing: bool = True):
+    # Documents at least this long are scanned directly instead of link by link
+    DIRECT_SCAN_MIN_LENGTH = 1024
+
+    # Amazon marketplace TLDs and URL prefix shared by the Amazon patterns
+    _AMZ_TLD = r'(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn|com\.au|com\.br|com\.mx)'
+    _AMZ_PREFIX = rf'https?://(?:www\.)?amazon\.{_AMZ_TLD}'
+
+    # Literals at least one of which every pattern of the network requires, checked before any regex
+    NETWORK_NEEDLES = {
+        'amazon': (b'amazon.', b'amzn.to'),
+        'shareasale': (b'shareasale.com',),
+        'cj_affiliate': (b'anrdoezrs.net', b'dpbolvw.net', b'tkqlhce.com', b'jdoqocy.com',
+                         b'kqzyfj.com', b'qksrv.net', b'awltovhc.com', b'vwcjb.net'),
+        'ebay': (b'ebay.com',),
+        'clickbank': (b'clickbank.net',)
+    }
+
+    def __init__(self, use_advanced_parsing: bool = True, networks: Optional[Iterable[str]] = None):
         """
         Initialize the scanner
 
         Args:
-            use_advanced_parsing: If True and BeautifulSoup is available, use it for parsing
+            use_advanced_parsing: If True and selectolax or BeautifulSoup is available, use it for parsing
+            networks: Networks to detect (keys of NETWORK_NEEDLES), defaults to all of them.
+                Only the selected networks' patterns are compiled and scanned for.
         """
-        self.use_advanced_parsing = use_advanced_parsing and BEAUTIFUL_SOUP_AVAILABLE
+        self.use_advanced_parsing = use_advanced_parsing and (SELECTOLAX_AVAILABLE or BEAUTIFUL_SOUP_AVAILABLE)
+        self.parser_name = 'selectolax' if SELECTOLAX_AVAILABLE else 'beautifulsoup'
+
+        pattern_compilers = {
+            'amazon': self._compile_amazon_patterns,
+            'shareasale': self._compile_shareasale_patterns,
+            'cj_affiliate': self._compile_cj_affiliate_patterns,
+            'ebay': self._compile_ebay_patterns,
+            'clickbank': self._compile_clickbank_patterns
+        }
 
-        # Compile regex patterns for better performance
+        if networks is None:
+            selected = list(pattern_compilers)
+        else:
+            requested = set(networks)
+            selected = [network for network in pattern_compilers if network in requested]
+            unknown = requested - set(pattern_compilers)
+            if unknown or not selected:
+                raise ValueError(f"Unknown or empty affiliate network selection: {sorted(unknown)}")
+        self.networks = tuple(selected)
+
+        # Compile regex patterns for better performance, one alternation per network
+        raw_patterns = {network: pattern_compilers[network]() for network in self.networks}
         self.patterns = {
-            'amazon': self._compile_amazon_patterns(),
-            'shareasale': self._compile_shareasale_patterns(),
-            'cj_affiliate': self._compile_cj_affiliate_patterns(),
-            'ebay': self._compile_ebay_patterns(),
-            'clickbank': self._compile_clickbank_patterns()
+            network: re.compile('|'.join(f'(?:{p.pattern})' for p in patterns), re.IGNORECASE)
+            for network, patterns in raw_patterns.items()
         }
 
+        # Union of all networks; the named group that matched identifies the network.
+        # The patterns are pure ASCII, so they match UTF-8 bytes on re's faster bytes path
+        union_source = '|'.join(f'(?P<{network}>{pattern.pattern})' for network, pattern in self.patterns.items())
+        self.union = self._compile_union(union_source.encode('ascii'))
+
+        # Same union extended to the end of the attribute value, for scanning raw HTML
+        self._direct_scan = self._compile_union(f'(?:{union_source}){_URL_TAIL}'.encode('ascii'))
+
+        # One Hyperscan database over every raw pattern, ids map back to the network
+        self._hs_database, self._hs_networks = self._compile_hyperscan_database(raw_patterns)
+
+        # Hyperscan scratch space cannot be shared by concurrent scans, keep one per thread
+        self._thread_local = threading.local()
+
+        # Prefilter literals for the selected networks only
+        self._literal_needles = tuple(
+            needle for network in self.networks for needle in self.NETWORK_NEEDLES[network]
+        )
+
         # Network display names
         self.network_names = {
             'amazon': 'Amazon Associates',
@@ -66,36 +159,28 @@ class AffiliateScanner:
         """Compile Amazon Associates detection patterns"""
         return [
             # tag parameter in query string
-            re.compile(
-                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn|com\.au|com\.br|com\.mx)/[^"\']*[?&](?:tag|associate-tag)=[a-zA-Z0-9_-]+',
-                re.IGNORECASE),
+            re.compile(rf'{self._AMZ_PREFIX}/[^"\'\s<>]*[?&](?:tag|associate-tag)=[a-zA-Z0-9_-]+', re.IGNORECASE),
             # gp/product with affiliate structure
-            re.compile(
-                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn|com\.au|com\.br|com\.mx)/gp/product/[^"\']*/ref=[^"\']*\?[^"\']*tag=[a-zA-Z0-9_-]+',
-                re.IGNORECASE),
+            re.compile(rf'{self._AMZ_PREFIX}/gp/product/[^"\'\s<>]*/ref=[^"\'\s<>]*\?[^"\'\s<>]*tag=[a-zA-Z0-9_-]+', re.IGNORECASE),
             # dp with affiliate structure
-            re.compile(
-                r'https?://(?:www\.)?amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn|com\.au|com\.br|com\.mx)/[^"\']*/dp/[^"\']*/ref=[^"\']*\?[^"\']*tag=[a-zA-Z0-9_-]+',
-                re.IGNORECASE),
+            re.compile(rf'{self._AMZ_PREFIX}/[^"\'\s<>]*/dp/[^"\'\s<>]*/ref=[^"\'\s<>]*\?[^"\'\s<>]*tag=[a-zA-Z0-9_-]+', re.IGNORECASE),
             # amzn.to short links (common affiliate shorteners)
             re.compile(r'https?://amzn\.to/[a-zA-Z0-9]+', re.IGNORECASE),
             # Amazon smile (sometimes used in affiliate marketing)
-            re.compile(
-                r'https?://smile\.amazon\.(?:com|co\.uk|ca|de|fr|it|es|co\.jp|cn|com\.au|com\.br|com\.mx)/[^"\']*[?&]tag=[a-zA-Z0-9_-]+',
-                re.IGNORECASE)
+            re.compile(rf'https?://smile\.amazon\.{self._AMZ_TLD}/[^"\'\s<>]*[?&]tag=[a-zA-Z0-9_-]+', re.IGNORECASE)
         ]
 
     def _compile_shareasale_patterns(self) -> List[re.Pattern]:
         """Compile ShareASale detection patterns"""
         return [
             # shareasale.com with r parameter
-            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\']*[?&]r=[0-9]+', re.IGNORECASE),
+            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\'\s<>]*[?&]r=[0-9]+', re.IGNORECASE),
             # shareasale.com with merchant ID patterns
-            re.compile(r'https?://(?:www\.)?shareasale\.com/r\.cfm\?[^"\']*(?:merchantID|m)=[0-9]+', re.IGNORECASE),
+            re.compile(r'https?://(?:www\.)?shareasale\.com/r\.cfm\?[^"\'\s<>]*(?:merchantID|m)=[0-9]+', re.IGNORECASE),
             # shareasale.com affiliate links
-            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\']*\?(?:[^"\']*&)*[a-zA-Z]+=[0-9]+', re.IGNORECASE),
+            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\'?\s<>]*\?(?:[^"\'\s<>]*&)?[a-zA-Z]+=[0-9]+', re.IGNORECASE),
             # shareasale.com with affiliate parameter
-            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\']*[?&]affiliate=[0-9]+', re.IGNORECASE)
+            re.compile(r'https?://(?:www\.)?shareasale\.com/[^"\'\s<>]*[?&]affiliate=[0-9]+', re.IGNORECASE)
         ]
 
     def _compile_cj_affiliate_patterns(self) -> List[re.Pattern]:
@@ -111,101 +196,158 @@ class AffiliateScanner:
             'vwcjb.net'
         ]
 
-        patterns = []
-        for domain in cj_domains:
-            # Match any URL from known CJ Affiliate domains
-            patterns.append(
-                re.compile(rf'https?://(?:www\.)?{re.escape(domain)}/[\w/\.-]+', re.IGNORECASE)
-            )
-
-        return patterns
+        # Match any URL from known CJ Affiliate domains, one alternation shares the scheme prefix
+        domains = '|'.join(re.escape(domain) for domain in cj_domains)
+        return [
+            re.compile(rf'https?://(?:www\.)?(?:{domains})/[\w/\.-]+', re.IGNORECASE)
+        ]
 
     def _compile_ebay_patterns(self) -> List[re.Pattern]:
         """Compile eBay Partner Network patterns"""
         return [
-            re.compile(r'https?://(?:www\.)?ebay\.com/[^"\']*[?&]_trksid=[a-zA-Z0-9_-]+', re.IGNORECASE),
-            re.compile(r'https?://(?:www\.)?ebay\.com/[^"\']*[?&]mkcid=[0-9]+', re.IGNORECASE),
-            re.compile(r'https?://(?:www\.)?ebay\.com/[^"\']*[?&]campid=[0-9]+', re.IGNORECASE)
+            re.compile(r'https?://(?:www\.)?ebay\.com/[^"\'\s<>]*[?&]_trksid=[a-zA-Z0-9_-]+', re.IGNORECASE),
+            re.compile(r'https?://(?:www\.)?ebay\.com/[^"\'\s<>]*[?&]mkcid=[0-9]+', re.IGNORECASE),
+            re.compile(r'https?://(?:www\.)?ebay\.com/[^"\'\s<>]*[?&]campid=[0-9]+', re.IGNORECASE)
         ]
 
     def _compile_clickbank_patterns(self) -> List[re.Pattern]:
         """Compile ClickBank patterns"""
         return [
-            re.compile(r'https?://(?:[a-zA-Z0-9-]+\.)?clickbank\.net/[^"\']*', re.IGNORECASE),
-            re.compile(r'https?://(?:hop|redirect)\.clickbank\.net/\?[^"\']*', re.IGNORECASE),
-            re.compile(r'https?://[^"\']*\.hop\.clickbank\.net[^"\']*', re.IGNORECASE)
+            re.compile(r'https?://(?:[a-zA-Z0-9-]+\.)?clickbank\.net/[^"\'\s<>]*', re.IGNORECASE),
+            re.compile(r'https?://(?:hop|redirect)\.clickbank\.net/\?[^"\'\s<>]*', re.IGNORECASE),
+            re.compile(r'https?://[^"\'\s<>]*\.hop\.clickbank\.net[^"\'\s<>]*', re.IGNORECASE)
         ]
 
-    def _extract_links_with_beautifulsoup(self, html_content: str) -> List[str]:
+    @staticmethod
+    def _compile_union(source: bytes):
+        """Compile a case-insensitive union pattern with RE2 when available, otherwise with re"""
+        if RE2_AVAILABLE:
+            try:
+                return re2.compile(b'(?i)' + source)
+            except re2.error as e:
+                logger.warning("RE2 compilation failed, using re module: %s", e)
+
+        return re.compile(source, re.IGNORECASE)
+
+    @staticmethod
+    def _compile_hyperscan_database(raw_patterns: Dict[str, List[re.Pattern]]):
+        """Compile all raw patterns into a single Hyperscan block-mode database"""
+        if not HYPERSCAN_AVAILABLE:
+            return None, []
+
+        expressions = []
+        networks = []
+        for network, patterns in raw_patterns.items():
+            for pattern in patterns:
+                expressions.append((pattern.pattern + _URL_TAIL).encode('utf-8'))
+                networks.append(network)
+
+        try:
+            database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            database.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(expressions)
+            )
+        except hyperscan.error as e:
+            logger.warning("Hyperscan compilation failed, using regex matching: %s", e)
+            return None, []
+
+        return database, networks
+
+    # URL attribute to read for each tag selected by _extract_links_with_selectolax
+    _SELECTOLAX_LINK_ATTRIBUTES = {
+        'a': 'href',
+        'link': 'href',
+        'img': 'src',
+        'script': 'src',
+        'iframe': 'src',
+        'frame': 'src',
+        'form': 'action'
+    }
+
+    def _extract_links_with_selectolax(self, html_content: str) -> Set[str]:
+        """Extract links using selectolax (single C-level traversal)"""
+        try:
+            tree = SelectolaxParser(html_content)
+            links = set()
+
+            selector = 'a[href], link[href], img[src], script[src], iframe[src], frame[src], form[action], meta[http-equiv]'
+            for node in tree.css(selector):
+                attributes = node.attributes
+
+                # Extract from meta refresh
+                if node.tag == 'meta':
+                    if 'refresh' in (attributes.get('http-equiv') or '').lower():
+                        url_match = re.search(r'url=(.+)', attributes.get('content') or '', re.I)
+                        if url_match:
+                            links.add(url_match.group(1))
+                    continue
+
+                link = attributes.get(self._SELECTOLAX_LINK_ATTRIBUTES[node.tag])
+                if link:
+                    links.add(link)
+
+            return links
+
+        except Exception as e:
+            logger.error("Error extracting links with selectolax: %s", e)
+            # Fall back to BeautifulSoup, or the regex method
+            if BEAUTIFUL_SOUP_AVAILABLE:
+                return self._extract_links_with_beautifulsoup(html_content)
+            return self._extract_links_with_regex(html_content)
+
+    def _extract_links_with_beautifulsoup(self, html_content: str) -> Set[str]:
         """Extract links using BeautifulSoup (more reliable)"""
         try:
             soup = BeautifulSoup(html_content, 'html.parser')
-            links = []
+            links = set()
 
             # Extract from href attributes
             for tag in soup.find_all(['a', 'link']):
                 href = tag.get('href')
                 if href:
-                    links.append(href)
+                    links.add(href)
 
             # Extract from src attributes
             for tag in soup.find_all(['img', 'script', 'iframe', 'frame']):
                 src = tag.get('src')
                 if src:
-                    links.append(src)
+                    links.add(src)
 
             # Extract from form actions
             for tag in soup.find_all('form'):
                 action = tag.get('action')
                 if action:
-                    links.append(action)
+                    links.add(action)
 
             # Extract from meta refresh
             for tag in soup.find_all('meta', attrs={'http-equiv': re.compile('refresh', re.I)}):
                 content = tag.get('content', '')
                 url_match = re.search(r'url=(.+)', content, re.I)
                 if url_match:
-                    links.append(url_match.group(1))
+                    links.add(url_match.group(1))
 
-            return list(set(links))
+            return links
 
         except Exception as e:
-            logger.error(f"Error extracting links with BeautifulSoup: {e}")
+            logger.error("Error extracting links with BeautifulSoup: %s", e)
             # Fall back to regex method
             return self._extract_links_with_regex(html_content)
 
     def _extract_links_with_regex(self, html_content: str) -> List[str]:
         """Extract links using regex (fallback method)"""
-        try:
-            links = []
-
-            # Pattern for href attributes
-            href_pattern = r'href\s*=\s*["\']([^"\']+)["\']'
-            href_matches = re.finditer(href_pattern, html_content, re.IGNORECASE)
-            links.extend(match.group(1) for match in href_matches)
-
-            # Pattern for src attributes
-            src_pattern = r'src\s*=\s*["\']([^"\']+)["\']'
-            src_matches = re.finditer(src_pattern, html_content, re.IGNORECASE)
-            links.extend(match.group(1) for match in src_matches)
-
-            # Pattern for action attributes
-            action_pattern = r'action\s*=\s*["\']([^"\']+)["\']'
-            action_matches = re.finditer(action_pattern, html_content, re.IGNORECASE)
-            links.extend(match.group(1) for match in action_matches)
+        # One pass for href, src and action; dedupe while preserving document order
+        return list(dict.fromkeys(match.group(1) for match in _ATTR_RE.finditer(html_content)))
 
-            # Remove duplicates and return
-            return list(set(links))
-
-        except Exception as e:
-            logger.error(f"Error extracting links with regex: {e}")
-            return []
-
-    def _extract_links_from_html(self, html_content: str) -> List[str]:
+    def _extract_links_from_html(self, html_content: str) -> Collection[str]:
         """
         Extract all URLs from HTML content using the best available method
         """
         if self.use_advanced_parsing:
+            if SELECTOLAX_AVAILABLE:
+                return self._extract_links_with_selectolax(html_content)
             return self._extract_links_with_beautifulsoup(html_content)
         else:
             return self._extract_links_with_regex(html_content)
@@ -214,107 +356,219 @@ class AffiliateScanner:
         """
         Basic URL normalization
         """
-        try:
-            # Remove leading/trailing whitespace
-            url = url.strip()
-
-            # Handle common URL encodings and entities
-            url = url.replace('&amp;', '&')
-            url = url.replace('&#38;', '&')
-            url = url.replace('&#x26;', '&')
+        # Remove leading/trailing whitespace
+        url = url.strip()
 
-            return url
-        except Exception:
+        # Most URLs carry no entities at all
+        if '&' not in url:
             return url
 
-    def _is_affiliate_link(self, url: str) -> Dict[str, str]:
+        # Handle common URL encodings and entities in one pass
+        return _ENTITY_RE.sub('&', url)
+
+    def _match_network(self, url: str) -> Optional[Tuple[str, str]]:
         """
         Check if a URL matches any affiliate network patterns
-        Returns dict with network name if found, empty dict otherwise
+        Returns (network, normalized_url) if found, None otherwise
         """
-        try:
-            # Normalize URL for better matching
-            normalized_url = self._normalize_url(url)
+        url = self._normalize_url(url)
+        match = self.union.search(url.encode('utf-8', 'replace'))
+        return (match.lastgroup, url) if match else None
 
-            for network, patterns in self.patterns.items():
-                for pattern in patterns:
-                    if pattern.search(normalized_url):
-                        return {
-                            'network': network,
-                            'display_name': self.network_names[network],
-                            'url': normalized_url
-                        }
+    def _match_networks(self, links: Collection[str]) -> Tuple[List[str], List[str]]:
+        """
+        Match many links with one union scan over a quote-separated buffer
+        Returns parallel lists of networks and normalized URLs for the affiliate links
+        """
+        network_hits = []
+        url_hits = []
+        # Spellings that normalize to the same URL (&amp; vs &, padding) are matched and counted once
+        urls = list(dict.fromkeys(self._normalize_url(link) for link in links))
+        encoded_urls = [url.encode('utf-8', 'replace') for url in urls]
+
+        # No pattern can match across a quote, so links can share one buffer unless they contain one
+        if any(b'"' in url for url in encoded_urls):
+            for url, encoded_url in zip(urls, encoded_urls):
+                match = self.union.search(encoded_url)
+                if match:
+                    network_hits.append(match.lastgroup)
+                    url_hits.append(url)
+            return network_hits, url_hits
+
+        starts = list(accumulate((len(url) + 1 for url in encoded_urls[:-1]), initial=0))
+
+        last_index = -1
+        for match in self.union.finditer(b'"'.join(encoded_urls)):
+            # Only the first match inside each link counts, as with a per-link search
+            index = bisect_right(starts, match.start()) - 1
+            if index != last_index:
+                last_index = index
+                network_hits.append(match.lastgroup)
+                url_hits.append(urls[index])
+
+        return network_hits, url_hits
+
+    def _iter_matches_with_hyperscan(self, html_bytes: bytes) -> Iterator[Tuple[str, int]]:
+        """
+        Match all raw patterns against the HTML in a single Hyperscan pass
+        """
+        spans = {}
 
-            return {}
+        def on_match(pattern_id, start, end, flags, context):
+            # Hyperscan reports every end offset, keep the longest match per start
+            current = spans.get(start)
+            if current is None or end > current[1]:
+                spans[start] = (pattern_id, end)
 
-        except Exception as e:
-            logger.error(f"Error checking affiliate link {url}: {e}")
-            return {}
+        scratch = getattr(self._thread_local, 'hs_scratch', None)
+        if scratch is None:
+            scratch = self._thread_local.hs_scratch = hyperscan.Scratch(self._hs_database)
+
+        self._hs_database.scan(html_bytes, match_event_handler=on_match, scratch=scratch)
+
+        # Drop matches nested inside an earlier one, as finditer would
+        last_end = 0
+        for start, (pattern_id, end) in sorted(spans.items()):
+            if start < last_end:
+                continue
+            last_end = end
+            yield self._hs_networks[pattern_id], start
+
+    def _iter_matches_with_regex(self, html_bytes: bytes) -> Iterator[Tuple[str, int]]:
+        """
+        Match the union pattern against the HTML with a single finditer
+        """
+        for match in self._direct_scan.finditer(html_bytes):
+            yield match.lastgroup, match.start()
 
-    def find_affiliate_links(self, html_content: str) -> Dict:
+    def _scan_html_directly(self, html_bytes: bytes) -> Tuple[List[str], List[str]]:
+        """
+        Run the union regex once over the raw HTML instead of over each extracted link
+        Returns parallel lists of networks and normalized URLs for the affiliate links
+
+        Applies the rules of the extracted-link path: only matches inside an href, src or
+        action value count, and each counts once as that whole value
+        """
+        # Attribute values spell '&' as an entity; decode it first so '&amp;tag=' matches the [?&] separators
+        html_bytes = _ENTITY_BYTES_RE.sub(b'&', html_bytes)
+
+        if self._hs_database is not None:
+            matches = self._iter_matches_with_hyperscan(html_bytes)
+        else:
+            matches = self._iter_matches_with_regex(html_bytes)
+
+        network_hits = []
+        url_hits = []
+        seen_urls = set()
+        value_starts = value_ends = None
+        last_index = -1
+
+        for network, start in matches:
+            # Attribute values are only located once the document has a match at all
+            if value_starts is None:
+                spans = [match.span(1) for match in _ATTR_BYTES_RE.finditer(html_bytes)]
+                value_starts = [value_start for value_start, _ in spans]
+                value_ends = [value_end for _, value_end in spans]
+
+            # Skip matches in text or scripts, and all but the first match inside a value
+            index = bisect_right(value_starts, start) - 1
+            if index < 0 or start >= value_ends[index] or index == last_index:
+                continue
+            last_index = index
+
+            # Only the hits are decoded back to text; spellings that normalize alike count once
+            url = self._normalize_url(html_bytes[value_starts[index]:value_ends[index]].decode('utf-8', 'replace'))
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+
+            network_hits.append(network)
+            url_hits.append(url)
+
+        return network_hits, url_hits
+
+    def find_affiliate_links(self, html_content: str, extract_all_links: bool = False,
+                             include_raw: bool = False) -> Dict:
         """
         Main function to find affiliate links in HTML content
 
         Args:
-            html_content (str): HTML content as string
+            html_content (str): HTML content as string or UTF-8 bytes
+            extract_all_links (bool): Always build the full link inventory with the
+                configured parser, even for large documents
+            include_raw (bool): Also return the matches as 'all_affiliate_links' when any are found (for debugging)
 
         Returns:
             dict: Analysis results with affiliate link information
         """
         try:
-            if not html_content or not isinstance(html_content, str):
+            if not html_content or not isinstance(html_content, (str, bytes)):
                 logger.warning("Invalid HTML content provided")
                 return self._empty_result()
 
             if len(html_content.strip()) == 0:
                 return self._empty_result()
 
-            # Extract all links from HTML
-            all_links = self._extract_links_from_html(html_content)
-            logger.info(f"Extracted {len(all_links)} total links from HTML")
+            # Encode once, the regex work below runs on bytes
+            if isinstance(html_content, str):
+                html_bytes = html_content.encode('utf-8', 'replace')
+            else:
+                html_bytes = html_content
+                html_content = html_bytes.decode('utf-8', 'replace')
 
-            if not all_links:
+            # Most pages carry no affiliate domain at all, skip parsing and regex work for them
+            html_lower = html_bytes.lower()
+            if not any(needle in html_lower for needle in self._literal_needles):
                 return self._empty_result()
 
-            # Check each link for affiliate patterns
-            affiliate_links = []
-            detected_networks = set()
+            if len(html_bytes) >= self.DIRECT_SCAN_MIN_LENGTH and not extract_all_links:
+                # One pass over the raw HTML instead of parsing it, matching the same attribute values
+                network_hits, url_hits = self._scan_html_directly(html_bytes)
+                parsing_method = 'direct_scan'
+            else:
+                # Extract all links from HTML
+                all_links = self._extract_links_from_html(html_content)
+                logger.info("Extracted %d total links from HTML", len(all_links))
+
+                if not all_links:
+                    return self._empty_result()
 
-            for link in all_links:
-                result = self._is_affiliate_link(link)
-                if result:
-                    affiliate_links.append(result)
-                    detected_networks.add(result['network'])
+                # Check each link for affiliate patterns
+                network_hits, url_hits = self._match_networks(all_links)
+                parsing_method = self.parser_name if self.use_advanced_parsing else 'regex'
 
             # Prepare results
-            unique_links = self._get_unique_links(affiliate_links)
+            detected_networks = set(network_hits)
+            unique_links = set(url_hits)
             sample_links = self._get_sample_urls(unique_links)
 
-            return {
-                'affiliate_links_found': len(affiliate_links) > 0,
+            result = {
+                'affiliate_links_found': len(url_hits) > 0,
                 'affiliate_networks': [self.network_names[net] for net in detected_networks],
-                'total_affiliate_links': len(affiliate_links),
+                'total_affiliate_links': len(url_hits),
                 'unique_affiliate_links': len(unique_links),
                 'details': sample_links,
-                'all_affiliate_links': affiliate_links,  # Full list for debugging
-                'parsing_method': 'beautifulsoup' if self.use_advanced_parsing else 'regex'
+                'parsing_method': parsing_method
             }
 
+            if include_raw:
+                # Full list for debugging, only materialized on request
+                result['all_affiliate_links'] = [
+                    {'network': network, 'display_name': self.network_names[network], 'url': url}
+                    for network, url in zip(network_hits, url_hits)
+                ]
+
+            return result
+
         except Exception as e:
-            logger.error(f"Error in find_affiliate_links: {e}")
+            logger.error("Error in find_affiliate_links: %s", e)
             return self._error_result(str(e))
 
-    def _get_unique_links(self, affiliate_links: List[Dict]) -> Set[str]:
-        """Get unique affiliate URLs"""
-        return set(link['url'] for link in affiliate_links)
-
     def _get_sample_urls(self, unique_links: Set[str], max_samples: int = 5) -> List[str]:
         """Get sample URLs for the result details"""
-        sample_list = list(unique_links)[:max_samples]
-
-        # Truncate long URLs for readability
+        # Truncate long URLs for readability, taking only the samples needed from the set
         truncated_samples = []
-        for url in sample_list:
+        for url in islice(unique_links, max_samples):
             if len(url) > 100:
                 truncated_samples.append(url[:100] + '...')
             else:
@@ -330,7 +584,6 @@ class AffiliateScanner:
             'total_affiliate_links': 0,
             'unique_affiliate_links': 0,
             'details': [],
-            'all_affiliate_links': [],
             'parsing_method': 'none'
         }
 
@@ -341,6 +594,12 @@ class AffiliateScanner:
         return result
 
 
+@lru_cache(maxsize=2)
+def _get_scanner(use_advanced_parsing: bool) -> AffiliateScanner:
+    """Return the shared scanner for a parsing mode, compiling its patterns once per process"""
+    return AffiliateScanner(use_advanced_parsing=use_advanced_parsing)
+
+
 # Module-level function for easy import and use
 def find_affiliate_links(html_content: str, use_advanced_parsing: bool = True) -> dict:
     """
@@ -348,7 +607,7 @@ def find_affiliate_links(html_content: str, use_advanced_parsing: bool = True) -
 
     Args:
         html_content (str): HTML content as string
-        use_advanced_parsing (bool): Whether to use BeautifulSoup if available
+        use_advanced_parsing (bool): Whether to use selectolax or BeautifulSoup if available
 
     Returns:
         dict: Analysis results with keys:
@@ -358,8 +617,7 @@ def find_affiliate_links(html_content: str, use_advanced_parsing: bool = True) -
             - details (list): Sample of found affiliate URLs (max 5)
     """
     try:
-        scanner = AffiliateScanner(use_advanced_parsing=use_advanced_parsing)
-        result = scanner.find_affiliate_links(html_content)
+        result = _get_scanner(bool(use_advanced_parsing)).find_affiliate_links(html_content)
 
         # Return only the specified fields in the public API
         return {
@@ -370,7 +628,7 @@ def find_affiliate_links(html_content: str, use_advanced_parsing: bool = True) -
             'parsing_method': result.get('parsing_method', 'unknown')
         }
     except Exception as e:
-        logger.error(f"Error in find_affiliate_links module function: {e}")
+        logger.error("Error in find_affiliate_links module function: %s", e)
         return {
             'affiliate_links_found': False,
             'affiliate_networks': [],
@@ -380,6 +638,37 @@ def find_affiliate_links(html_content: str, use_advanced_parsing: bool = True) -
         }
 
 
+def _prewarm(use_advanced_parsing: bool) -> None:
+    """Build the cached scanner once when a batch worker process starts"""
+    _get_scanner(bool(use_advanced_parsing))
+
+
+def find_affiliate_links_batch(html_documents: List[str], use_advanced_parsing: bool = True,
+                               workers: Optional[int] = None, use_threads: bool = False) -> List[dict]:
+    """
+    Find affiliate marketing links in many HTML documents in parallel
+
+    Args:
+        html_documents (list): HTML documents as strings
+        use_advanced_parsing (bool): Whether to use selectolax or BeautifulSoup if available
+        workers (int): Number of workers, defaults to the CPU count
+        use_threads (bool): Use a thread pool instead of processes; only worthwhile when
+            RE2 or Hyperscan is installed, since they release the GIL while matching
+
+    Returns:
+        list: One find_affiliate_links result per document, in input order
+    """
+    scan = partial(find_affiliate_links, use_advanced_parsing=use_advanced_parsing)
+
+    if use_threads:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(scan, html_documents))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_prewarm,
+                             initargs=(use_advanced_parsing,)) as executor:
+        return list(executor.map(scan, html_documents, chunksize=16))
+
+
 # Utility function to check dependencies
 def check_dependencies() -> Dict[str, bool]:
     """
@@ -390,12 +679,17 @@ def check_dependencies() -> Dict[str, bool]:
     """
     return {
         'beautifulsoup4': BEAUTIFUL_SOUP_AVAILABLE,
-        'urllib3': URLLIB3_AVAILABLE
+        'selectolax': SELECTOLAX_AVAILABLE,
+        'urllib3': URLLIB3_AVAILABLE,
+        're2': RE2_AVAILABLE,
+        'hyperscan': HYPERSCAN_AVAILABLE
     }
 
 
 # Example usage and testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     print("Testing Affiliate Scanner with Dependency Check...")
     print("=" * 50)
 
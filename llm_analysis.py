@@ -3,47 +3,283 @@ LLM Analysis Module for TruthSignal
 Analyzes website content for disclosures and intent using free LLM APIs.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
+import random
 import requests
-from typing import Dict, Optional, List
+import sys
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from typing import Awaitable, Dict, Iterable, Optional, List, Tuple
 import time
 
+from semantic_cache import EMBEDDINGS_AVAILABLE, shared_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try to import orjson for faster JSON parsing, but provide fallback
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+    _json_loads = orjson.loads
+except ImportError:
+    ORJSON_AVAILABLE = False
+    _json_loads = json.loads
+
+# Try to load a tiktoken encoding for token-accurate truncation, but provide fallback
+try:
+    import tiktoken
+
+    _TOKEN_ENCODING = tiktoken.get_encoding('cl100k_base')
+    TIKTOKEN_AVAILABLE = True
+except Exception:  # package missing, or the encoding file could not be fetched
+    _TOKEN_ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+
 class LLMAnalysisError(Exception):
     """Custom exception for LLM analysis failures"""
     pass
 
+
+class RetryableLLMError(LLMAnalysisError):
+    """Transient provider failure (rate limit, overload, timeout) worth retrying"""
+    pass
+
+
+# Status codes that signal a transient provider problem
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 529})
+
+# Retry policy for transient failures on a single provider
+MAX_ATTEMPTS_PER_PROVIDER = 5
+RETRY_BASE_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 30.0
+
+# Provider name -> time.monotonic() until which it asked us to back off (Retry-After)
+_PROVIDER_COOLDOWNS: Dict[str, float] = {}
+
+# Status codes a provider answers with when it does not support stream=True or a json_schema response format
+UNSUPPORTED_REQUEST_STATUS_CODES = frozenset({400, 422})
+
+# Providers that rejected such a request, later requests to them go out as plain json_object calls
+_PLAIN_REQUEST_PROVIDERS = set()
+
+
+def _build_http_session() -> requests.Session:
+    """Create a pooled HTTP session so provider connections are kept alive between calls"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared by every FreeLLMClient, repeat calls to a provider skip the TCP + TLS handshake
+_HTTP_SESSION = _build_http_session()
+
+
+# Bump whenever SYSTEM_PROMPT or response handling changes, so cached analyses are not reused
+PROMPT_VERSION = 3
+
+# Exact-match cache of analyses keyed on a hash of models, prompt version and text
+LLM_CACHE_MAXSIZE = 10_000
+LLM_CACHE_TTL_SECONDS = 3600
+_llm_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+
+def _llm_cache_namespace(client: "FreeLLMClient", preferred_provider: Optional[str]) -> str:
+    """Everything besides the text that determines an analysis"""
+    models = ','.join(f"{p['name']}:{p['model']}" for p in client.providers)
+    return f"{models}|{preferred_provider}|{PROMPT_VERSION}"
+
+
+def _llm_cache_key(namespace: str, text: str) -> str:
+    """Hash the namespace and text into an exact-match cache key"""
+    return hashlib.sha256(f"{namespace}|{text}".encode('utf-8')).hexdigest()
+
+
+def _llm_cache_get(key: str) -> Optional[Dict]:
+    """Return a copy of a cached analysis, or None if missing or expired"""
+    entry = _llm_cache.get(key)
+    if entry is None:
+        return None
+
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        del _llm_cache[key]
+        return None
+
+    _llm_cache.move_to_end(key)
+    return dict(result)
+
+
+def _llm_cache_set(key: str, result: Dict) -> None:
+    """Store an analysis, evicting the least recently used entries beyond the size limit"""
+    _llm_cache[key] = (time.monotonic() + LLM_CACHE_TTL_SECONDS, dict(result))
+    _llm_cache.move_to_end(key)
+    while len(_llm_cache) > LLM_CACHE_MAXSIZE:
+        _llm_cache.popitem(last=False)
+
+
+# Shape of one analysis, enforced by providers with json_schema support and checked by _validate_analysis
+ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'disclosure_found': {'type': 'boolean'},
+        'disclosure_location': {'type': 'string', 'enum': ['beginning', 'middle', 'end', 'nowhere']},
+        'content_intent': {'type': 'string', 'enum': ['informative', 'persuasive', 'mixed']},
+        'confidence_score': {'type': 'number', 'minimum': 0, 'maximum': 1},
+        'reasoning': {'type': 'string'}
+    },
+    'required': ['disclosure_found', 'disclosure_location', 'content_intent', 'confidence_score', 'reasoning'],
+    'additionalProperties': False
+}
+
+# One analysis per numbered document, in document order
+BATCH_ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'results': {'type': 'array', 'items': ANALYSIS_SCHEMA}
+    },
+    'required': ['results'],
+    'additionalProperties': False
+}
+
+RESPONSE_SCHEMAS = {
+    'analysis': ANALYSIS_SCHEMA,
+    'analysis_batch': BATCH_ANALYSIS_SCHEMA
+}
+
+# Validation lookups derived from the schema once, membership checks are set lookups
+_REQUIRED_FIELDS = tuple(ANALYSIS_SCHEMA['required'])
+_LOCATION_VALUES = ANALYSIS_SCHEMA['properties']['disclosure_location']['enum']
+_INTENT_VALUES = ANALYSIS_SCHEMA['properties']['content_intent']['enum']
+_VALID_LOCATIONS = frozenset(_LOCATION_VALUES)
+_VALID_INTENTS = frozenset(_INTENT_VALUES)
+
+# Every instruction lives in the system message so the request prefix is byte-identical across pages
+# and providers with prefix caching (DeepSeek) bill it as cached input; the page text comes last.
+# The schema carries the output shape, so the prose only explains the judgement calls
+SYSTEM_PROMPT = (
+    "You are an expert analyst of sponsorship disclosures and content intent. "
+    "For the text between <<<DOCUMENT>>> and <<<END>>>, find statements about sponsorships, affiliate links, "
+    "partnerships, paid content or commissions and where the first one appears (beginning = first 20%, "
+    "middle = 20-80%, end = last 20%, nowhere = none), and judge whether the content is informative, "
+    "persuasive (sales-oriented) or mixed, basing this only on the actual text. "
+    "Reply with JSON matching the schema below, confidence_score being your certainty (0.5 uncertain, "
+    "0.9+ very confident); for several numbered documents reply {\"results\": [...]} with one object per "
+    "document in order.\n\nSchema: "
+    + json.dumps(ANALYSIS_SCHEMA, separators=(',', ':'))
+)
+
+# User message for a single document
+DOCUMENT_TEMPLATE = "<<<DOCUMENT>>>\n{text}\n<<<END>>>"
+
+# User message block for document {number} of a batch
+BATCH_DOCUMENT_TEMPLATE = "<<<DOCUMENT {number} of {count}>>>\n{text}\n<<<END>>>"
+
+# Conservative characters-per-token estimate used when tiktoken is unavailable
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+# Longest run of characters a single token is assumed to cover, bounds how much text gets encoded
+MAX_CHARS_PER_TOKEN = 16
+
+
+def _truncate_to_token_budget(text: str, budget: int) -> str:
+    """Cut text to at most budget tokens (estimated from characters without tiktoken)"""
+    if not TIKTOKEN_AVAILABLE:
+        return text[:budget * CHARS_PER_TOKEN_ESTIMATE]
+
+    tokens = _TOKEN_ENCODING.encode(text[:budget * MAX_CHARS_PER_TOKEN], disallowed_special=())
+    if len(tokens) <= budget:
+        return text[:budget * MAX_CHARS_PER_TOKEN]
+    return _TOKEN_ENCODING.decode(tokens[:budget])
+
+
+def _estimate_tokens(text: str) -> int:
+    """Token count of text (estimated from characters without tiktoken)"""
+    if not TIKTOKEN_AVAILABLE:
+        return -(-len(text) // CHARS_PER_TOKEN_ESTIMATE)
+    return len(_TOKEN_ENCODING.encode(text, disallowed_special=()))
+
+
+def _split_by_token_budget(items: List, budget: int) -> List[List]:
+    """
+    Split queued (text, provider, future) items into groups whose texts together fit one request's budget
+    Every text is already truncated to the budget, so each group holds at least one item
+    """
+    groups = []
+    group = []
+    group_tokens = 0
+    for item in items:
+        tokens = _estimate_tokens(item[0])
+        if group and group_tokens + tokens > budget:
+            groups.append(group)
+            group = []
+            group_tokens = 0
+        group.append(item)
+        group_tokens += tokens
+
+    if group:
+        groups.append(group)
+    return groups
+
+
+# Micro-batching of concurrent analyses into one provider request
+LLM_BATCH_MAX_SIZE = 8
+LLM_BATCH_MAX_WAIT_MS = 50
+LLM_MAX_TOKENS_PER_ANALYSIS = 1000
+
+
+# Second cache tier for near-duplicate texts, only when sentence-transformers is installed
+_semantic_cache = shared_cache() if EMBEDDINGS_AVAILABLE else None
+
+
 class FreeLLMClient:
     """Client for various free LLM providers"""
 
-    def __init__(self):
-        self.providers = self._setup_providers()
+    def __init__(self, session: Optional[requests.Session] = None):
+        # API keys are read once; providers without a key are left out entirely
+        self.providers = [provider for provider in self._setup_providers() if provider['api_key']]
+        self._available_names = [provider['name'] for provider in self.providers]
+        self._provider_order = {
+            provider['name']: [provider] + [other for other in self.providers if other is not provider]
+            for provider in self.providers
+        }
+        self.session = session or _HTTP_SESSION
+        self._cooldown = _PROVIDER_COOLDOWNS
 
     def _setup_providers(self) -> List[Dict]:
         """Setup available free LLM providers"""
+        deepseek_key = os.getenv('DEEPSEEK_API_KEY')
+        groq_key = os.getenv('GROQ_API_KEY')
         return [
             {
                 'name': 'deepseek',
                 'base_url': 'https://api.deepseek.com/v1',
-                'api_key': os.getenv('DEEPSEEK_API_KEY'),
+                'api_key': deepseek_key,
                 'model': 'deepseek-chat',
-                'headers': lambda key: {
-                    'Authorization': f'Bearer {key}',
+                'input_budget': 3000,  # Tokens of page text, kept low for cost
+                'json_schema': False,  # Only json_object response format
+                'headers': {
+                    'Authorization': f'Bearer {deepseek_key}',
                     'Content-Type': 'application/json'
                 }
             },
             {
                 'name': 'groq',
                 'base_url': 'https://api.groq.com/openai/v1',
-                'api_key': os.getenv('GROQ_API_KEY'),
+                'api_key': groq_key,
                 'model': 'llama-3.1-8b-instant',  # Fast and free - updated model
-                'headers': lambda key: {
-                    'Authorization': f'Bearer {key}',
+                'input_budget': 6000,  # Tokens of page text
+                'json_schema': True,
+                'headers': {
+                    'Authorization': f'Bearer {groq_key}',
                     'Content-Type': 'application/json'
                 }
             }
@@ -51,48 +287,97 @@ class FreeLLMClient:
 
     def get_available_providers(self) -> List[str]:
         """Get list of providers with API keys available"""
-        available = []
-        for provider in self.providers:
-            if provider['api_key']:
-                available.append(provider['name'])
-        return available
+        return list(self._available_names)
 
-    def call_provider(self, prompt: str, provider_name: str = None) -> str:
-        """
-        Call LLM provider with fallback logic
-        """
-        # Try specified provider first, then fall back to available ones
-        providers_to_try = []
+    def input_budget(self, provider_name: str = None) -> int:
+        """Token budget for page text that every provider call_provider may fall back to accepts"""
+        return min(provider['input_budget'] for provider in self._providers_to_try(provider_name))
 
-        if provider_name:
-            # Try the specified provider
-            target_provider = next((p for p in self.providers if p['name'] == provider_name), None)
-            if target_provider and target_provider['api_key']:
-                providers_to_try.append(target_provider)
+    def _providers_to_try(self, provider_name: str = None) -> List[Dict]:
+        """Providers in the order call_provider tries them: the specified one first, then the others"""
+        if not self.providers:
+            raise LLMAnalysisError("No LLM providers configured. Please set at least one API key.")
 
-        # Add other available providers as fallbacks
-        for provider in self.providers:
-            if provider['api_key'] and provider not in providers_to_try:
-                providers_to_try.append(provider)
+        return self._provider_order.get(provider_name, self.providers)
 
-        if not providers_to_try:
-            raise LLMAnalysisError("No LLM providers configured. Please set at least one API key.")
+    def call_provider(self, prompt: str, provider_name: str = None,
+                      max_tokens: int = LLM_MAX_TOKENS_PER_ANALYSIS, schema_name: str = 'analysis') -> str:
+        """
+        Call LLM provider with fallback logic
+        """
+        providers_to_try = self._providers_to_try(provider_name)
 
         # Try each provider until one works
         last_error = None
+        cooling_down = {}
         for provider in providers_to_try:
+            cooldown_remaining = self._cooldown.get(provider['name'], 0.0) - time.monotonic()
+            if cooldown_remaining > 0:
+                logger.info(f"Skipping provider {provider['name']}: rate-limit cooldown active")
+                cooling_down[provider['name']] = cooldown_remaining
+                continue
+
             try:
                 logger.info(f"Trying provider: {provider['name']}")
-                return self._make_request(provider, prompt)
+                return self._request_with_retries(provider, prompt, max_tokens, schema_name)
             except Exception as e:
                 last_error = e
                 logger.warning(f"Provider {provider['name']} failed: {e}")
                 continue
 
+        if cooling_down:
+            next_provider = min(cooling_down, key=cooling_down.get)
+            cooldown_message = f"{next_provider} is available again in {cooling_down[next_provider]:.1f}s"
+            if last_error is None:
+                raise LLMAnalysisError(f"All providers are in rate-limit cooldown; {cooldown_message}")
+            raise LLMAnalysisError(f"All providers failed. Last error: {last_error}; {cooldown_message}")
+
         raise LLMAnalysisError(f"All providers failed. Last error: {last_error}")
 
-    def _make_request(self, provider: Dict, prompt: str) -> str:
-        """Make actual API request to provider"""
+    def _request_with_retries(self, provider: Dict, prompt: str, max_tokens: int = LLM_MAX_TOKENS_PER_ANALYSIS,
+                              schema_name: str = 'analysis') -> str:
+        """
+        Call one provider, retrying transient failures with exponential backoff and jitter
+        Gives up early when the provider asks for a longer cooldown than the maximum delay
+        """
+        for attempt in range(MAX_ATTEMPTS_PER_PROVIDER):
+            try:
+                return self._make_request(provider, prompt, max_tokens, schema_name)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                error = RetryableLLMError(f"Transient network error: {e}")
+            except RetryableLLMError as e:
+                error = e
+
+            if attempt == MAX_ATTEMPTS_PER_PROVIDER - 1:
+                raise error
+
+            delay = min(RETRY_BASE_DELAY_SECONDS * 2 ** attempt + random.uniform(0, 1), RETRY_MAX_DELAY_SECONDS)
+            cooldown_remaining = self._cooldown.get(provider['name'], 0.0) - time.monotonic()
+            if cooldown_remaining > RETRY_MAX_DELAY_SECONDS:
+                raise error
+            delay = max(delay, cooldown_remaining)
+
+            logger.info(f"Retrying provider {provider['name']} in {delay:.1f}s after: {error}")
+            time.sleep(delay)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given in seconds"""
+        try:
+            return max(float(value), 0.0) if value else None
+        except ValueError:
+            return None
+
+    def _make_request(self, provider: Dict, prompt: str, max_tokens: int = LLM_MAX_TOKENS_PER_ANALYSIS,
+                      schema_name: str = 'analysis', extended: Optional[bool] = None) -> str:
+        """
+        Make actual API request to provider
+        Extended requests stream the response, stopping once the JSON object is complete,
+        and ask providers that support it to enforce the response schema
+        """
+        if extended is None:
+            extended = provider['name'] not in _PLAIN_REQUEST_PROVIDERS
+
         url = f"{provider['base_url']}/chat/completions"
 
         payload = {
@@ -100,35 +385,295 @@ class FreeLLMClient:
             'messages': [
                 {
                     'role': 'system',
-                    'content': 'You are an expert analyst specialized in identifying content disclosures and intent. Provide precise, structured JSON responses.'
+                    'content': SYSTEM_PROMPT
                 },
                 {
                     'role': 'user',
                     'content': prompt
                 }
             ],
-            'max_tokens': 1000,
+            'max_tokens': max_tokens,
             'temperature': 0.1,
             'response_format': {'type': 'json_object'}
         }
+        if extended:
+            payload['stream'] = True
+            if provider['json_schema']:
+                payload['response_format'] = {
+                    'type': 'json_schema',
+                    'json_schema': {'name': schema_name, 'schema': RESPONSE_SCHEMAS[schema_name], 'strict': True}
+                }
+
+        headers = provider['headers']
+
+        with self.session.post(url, json=payload, headers=headers, stream=extended, timeout=30) as response:
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after:
+                    self._cooldown[provider['name']] = time.monotonic() + retry_after
+                raise RetryableLLMError(f"API request failed: {response.status_code} - {response.text}")
+
+            if extended and response.status_code in UNSUPPORTED_REQUEST_STATUS_CODES:
+                logger.info(f"Provider {provider['name']} rejected streaming or json_schema, retrying a plain request")
+                content = self._make_request(provider, prompt, max_tokens, schema_name, extended=False)
+                _PLAIN_REQUEST_PROVIDERS.add(provider['name'])
+                return content
+
+            if response.status_code != 200:
+                raise LLMAnalysisError(f"API request failed: {response.status_code} - {response.text}")
+
+            if extended:
+                # Stop as soon as the JSON object closes instead of waiting out the rest of the generation;
+                # closing the unread stream drops this keep-alive connection, the pool opens a new one
+                content = self._read_json_stream(response.iter_lines())
+                response.close()
+                return content
+
+            result = _json_loads(response.content)
+            return result['choices'][0]['message']['content']
+
+    @staticmethod
+    def _read_json_stream(lines: Iterable[bytes]) -> str:
+        """
+        Collect the content deltas of a server-sent event stream
+        Returns as soon as the top-level JSON object closes, ignoring braces inside strings
+        """
+        content = []
+        depth = 0
+        in_string = False
+        escaped = False
+        for line in lines:
+            if not line.startswith(b'data:'):
+                continue
+            data = line[5:].strip()
+            if data == b'[DONE]':
+                break
+
+            choices = _json_loads(data).get('choices') or [{}]
+            delta = (choices[0].get('delta') or {}).get('content')
+            if not delta:
+                continue
+
+            for index, char in enumerate(delta):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == '\\':
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '"':
+                    in_string = True
+                elif char == '{':
+                    depth += 1
+                elif char == '}':
+                    depth -= 1
+                    if depth == 0:
+                        content.append(delta[:index + 1])
+                        return ''.join(content)
+            content.append(delta)
+
+        return ''.join(content)
+
+
+def _parse_llm_json(llm_response: str):
+    """Parse the JSON body of an LLM response"""
+    try:
+        return _json_loads(llm_response)
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse LLM JSON response: {e}")
+        logger.error(f"Raw response: {llm_response}")
+        raise LLMAnalysisError(f"Invalid JSON response from LLM: {e}")
+
+
+def _validate_analysis(analysis_result) -> None:
+    """
+    Check one parsed analysis for the required fields, types and values
+    The enum values are interned, so they are the same objects as the literals scoring compares against
+    """
+    if not isinstance(analysis_result, dict):
+        raise LLMAnalysisError("LLM response must be a JSON object")
+
+    for field in _REQUIRED_FIELDS:
+        if field not in analysis_result:
+            raise LLMAnalysisError(f"Missing required field in LLM response: {field}")
+
+    if not isinstance(analysis_result['disclosure_found'], bool):
+        raise LLMAnalysisError("disclosure_found must be a boolean")
+
+    if analysis_result['disclosure_location'] not in _VALID_LOCATIONS:
+        raise LLMAnalysisError(f"disclosure_location must be one of: {_LOCATION_VALUES}")
+
+    if analysis_result['content_intent'] not in _VALID_INTENTS:
+        raise LLMAnalysisError(f"content_intent must be one of: {_INTENT_VALUES}")
+
+    confidence = analysis_result['confidence_score']
+    if not isinstance(confidence, (int, float)) or confidence < 0.0 or confidence > 1.0:
+        raise LLMAnalysisError("confidence_score must be a float between 0.0 and 1.0")
+
+    analysis_result['disclosure_location'] = sys.intern(analysis_result['disclosure_location'])
+    analysis_result['content_intent'] = sys.intern(analysis_result['content_intent'])
 
-        headers = provider['headers'](provider['api_key'])
 
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+class LLMBatcher:
+    """
+    Groups concurrent analyses into one chat completion with numbered documents
+    A batch is sent when it holds max_batch texts or the first one has waited max_wait_ms
+    """
+
+    def __init__(self, max_batch: int = LLM_BATCH_MAX_SIZE, max_wait_ms: float = LLM_BATCH_MAX_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = set()
+
+    def start(self) -> None:
+        """Start the background worker on the running event loop"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._batch_worker())
+
+    async def stop(self) -> None:
+        """Stop the worker and fail anything still waiting in the queue"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(LLMAnalysisError("LLM batching stopped before the request was sent"))
+
+    async def submit(self, text: str, preferred_provider: Optional[str] = None) -> Dict:
+        """Queue a text and wait for its parsed (not yet validated) analysis"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, preferred_provider, future))
+        return await future
+
+    async def _batch_worker(self) -> None:
+        """Drain the queue into batches and dispatch each without waiting for the previous one"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that gave up while queued (cancelled futures) cost no provider call
+            batch = [item for item in batch if not item[2].done()]
+
+            # Provider preference changes the request, so only like requests share a call
+            groups: Dict[Optional[str], List] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+
+            for preferred_provider, items in groups.items():
+                task = asyncio.create_task(self._dispatch(items, preferred_provider))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, items: List, preferred_provider: Optional[str]) -> None:
+        """Send a batch in as few provider calls as the input budget allows, at the same time"""
+        try:
+            groups = _split_by_token_budget(items, _CLIENT.input_budget(preferred_provider))
+        except LLMAnalysisError:
+            # No provider configured; the call below fails every future with the same error
+            groups = [items]
+
+        await asyncio.gather(*(self._dispatch_group(group, preferred_provider) for group in groups))
+
+    async def _dispatch_group(self, items: List, preferred_provider: Optional[str]) -> None:
+        """Send one group of texts to the provider and resolve every waiting future"""
+        texts = [text for text, _, _ in items]
+        try:
+            analyses = await asyncio.to_thread(self._analyze_batch, texts, preferred_provider)
+        except Exception as e:
+            analyses = [e] * len(items)
+
+        for (_, _, future), analysis in zip(items, analyses):
+            if future.done():
+                continue
+            if isinstance(analysis, Exception):
+                future.set_exception(analysis)
+            else:
+                future.set_result(analysis)
+
+    def _analyze_batch(self, texts: List[str], preferred_provider: Optional[str]) -> List:
+        """
+        Analyze texts with one provider call, returning a parsed analysis or an exception per text
+        Falls back to one call per text when the batched response cannot be split
+        """
+        client = _CLIENT
+        if len(texts) > 1:
+            prompt = '\n\n'.join(BATCH_DOCUMENT_TEMPLATE.format(number=number, count=len(texts), text=text)
+                                 for number, text in enumerate(texts, 1))
+            logger.info(f"Sending batched request to LLM API for {len(texts)} documents")
+            llm_response = client.call_provider(prompt, preferred_provider,
+                                                max_tokens=LLM_MAX_TOKENS_PER_ANALYSIS * len(texts),
+                                                schema_name='analysis_batch')
+            try:
+                results = _parse_llm_json(llm_response).get('results')
+            except (LLMAnalysisError, AttributeError):
+                results = None
+            if isinstance(results, list) and len(results) == len(texts):
+                return results
+            logger.warning("Batched LLM response did not hold one result per document, retrying individually")
+
+        analyses = []
+        for text in texts:
+            try:
+                llm_response = client.call_provider(DOCUMENT_TEMPLATE.format(text=text), preferred_provider)
+                analyses.append(_parse_llm_json(llm_response))
+            except Exception as e:
+                analyses.append(e)
+        return analyses
+
+
+# Built once at import, so the hot path skips the provider setup and environment lookups
+_CLIENT = FreeLLMClient()
+
+
+# Set by start_llm_batching(); analyze_with_llm calls the provider directly while it is None
+_llm_batcher: Optional[LLMBatcher] = None
+
 
-        if response.status_code != 200:
-            raise LLMAnalysisError(f"API request failed: {response.status_code} - {response.text}")
+def start_llm_batching(max_batch: int = LLM_BATCH_MAX_SIZE, max_wait_ms: float = LLM_BATCH_MAX_WAIT_MS) -> None:
+    """Route analyze_with_llm through a micro-batching worker on the running event loop"""
+    global _llm_batcher
+    if _llm_batcher is None:
+        _llm_batcher = LLMBatcher(max_batch, max_wait_ms)
+        _llm_batcher.start()
 
-        result = response.json()
-        return result['choices'][0]['message']['content']
 
-def analyze_with_llm(cleaned_text: str, preferred_provider: str = None) -> Dict:
+async def stop_llm_batching() -> None:
+    """Stop the micro-batching worker and go back to one provider call per analysis"""
+    global _llm_batcher
+    if _llm_batcher is not None:
+        batcher, _llm_batcher = _llm_batcher, None
+        await batcher.stop()
+
+
+async def analyze_with_llm(cleaned_text: str, preferred_provider: str = None,
+                           fingerprint: Optional[Awaitable] = None) -> Dict:
     """
     Analyze cleaned text for sponsorship disclosures and content intent using free LLM APIs.
 
     Args:
         cleaned_text: Text content with HTML tags removed
         preferred_provider: Preferred provider name ('deepseek', 'groq')
+        fingerprint: Pending shared-cache fingerprint of cleaned_text, computed here when omitted
 
     Returns:
         Dictionary containing:
@@ -138,13 +683,14 @@ def analyze_with_llm(cleaned_text: str, preferred_provider: str = None) -> Dict:
             - confidence_score: float (0.0 to 1.0)
             - llm_analysis_raw: string (raw LLM reasoning)
             - provider_used: string (which LLM provider was used)
+            - cache_hit: bool (True when served from the analysis cache)
 
     Raises:
         LLMAnalysisError: If analysis fails due to API errors or timeouts
     """
 
-    # Initialize LLM client
-    client = FreeLLMClient()
+    # Shared client, built once at import
+    client = _CLIENT
 
     # Check available providers
     available_providers = client.get_available_providers()
@@ -157,90 +703,70 @@ def analyze_with_llm(cleaned_text: str, preferred_provider: str = None) -> Dict:
 
     logger.info(f"Available LLM providers: {available_providers}")
 
-    # Optimized prompt template
-    prompt_template = """
-Analyze the following text content and provide a structured assessment of sponsorship disclosures and content intent.
-
-TEXT TO ANALYZE:
-{text}
-
-INSTRUCTIONS:
-1. Disclosure Analysis:
-   - Look for clear statements about sponsorships, affiliate links, partnerships, paid content, or compensation
-   - Identify if disclosure is present and its location in the content
-   - Consider phrases like "sponsored", "affiliate", "paid", "commission", "partner", "advertisement"
-
-2. Content Intent Assessment:
-   - "informative": Primarily educational, factual, or news-oriented without strong sales pressure
-   - "persuasive": Clearly sales-oriented, promotional, or trying to convince to purchase
-   - "mixed": Combination of informative and persuasive elements
-
-3. Provide your analysis in this exact JSON format:
-{{
-    "disclosure_found": true/false,
-    "disclosure_location": "beginning/middle/end/nowhere",
-    "content_intent": "informative/persuasive/mixed",
-    "confidence_score": 0.0-1.0,
-    "reasoning": "Your detailed reasoning here"
-}}
-
-CRITICAL GUIDELINES:
-- Be precise about disclosure location: "beginning" (first 20%), "middle" (20-80%), "end" (last 20%), "nowhere"
-- Confidence score should reflect certainty in your assessment (0.5 = uncertain, 0.9+ = very confident)
-- If no clear disclosure is found, set disclosure_found to false and location to "nowhere"
-- Consider the overall tone, language, and explicit statements in the content
-- Base your assessment on the actual text content, not assumptions
-"""
+    # Limit text to the token budget of the providers that may serve it
+    text = _truncate_to_token_budget(cleaned_text, client.input_budget(preferred_provider))
+
+    # Re-scans of the same page skip the LLM round-trip entirely
+    cache_namespace = _llm_cache_namespace(client, preferred_provider)
+    cache_key = _llm_cache_key(cache_namespace, text)
+    cached_result = _llm_cache_get(cache_key)
+    if cached_result is not None:
+        logger.info("Returning cached LLM analysis")
+        cached_result['cache_hit'] = True
+        return cached_result
+
+    # Near-duplicates of a cached text cost one local embedding instead of an LLM call
+    embedding = None
+    if _semantic_cache is not None:
+        try:
+            # Only the embedding runs on a worker thread; get() and add() stay on the event loop,
+            # so an eviction can never shift the entries while a lookup is reading them
+            # The embedding model only reads the opening tokens, so the full text's fingerprint serves the truncated one
+            if fingerprint is not None:
+                embedding = await fingerprint
+            else:
+                embedding = await asyncio.to_thread(_semantic_cache.fingerprint, text)
+            cached_result = _semantic_cache.get(cache_namespace, embedding)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+        if cached_result is not None:
+            logger.info("Returning semantically cached LLM analysis")
+            _llm_cache_set(cache_key, cached_result)
+            cached_result['cache_hit'] = True
+            return cached_result
 
     try:
-        # Prepare the prompt
-        formatted_prompt = prompt_template.format(text=cleaned_text[:8000])  # Limit text length
+        if _llm_batcher is not None:
+            # Concurrent requests share one provider call; validation stays per document
+            analysis_result = await _llm_batcher.submit(text, preferred_provider)
+        else:
+            # Prepare the prompt
+            formatted_prompt = DOCUMENT_TEMPLATE.format(text=text)
 
-        logger.info("Sending request to LLM API for analysis")
+            logger.info("Sending request to LLM API for analysis")
 
-        # Make API call
-        llm_response = client.call_provider(formatted_prompt, preferred_provider)
-        logger.info("Received response from LLM")
+            # Make API call on a worker thread so the event loop keeps serving other requests
+            llm_response = await asyncio.to_thread(client.call_provider, formatted_prompt, preferred_provider)
+            logger.info("Received response from LLM")
 
-        # Parse JSON response from LLM
-        try:
-            analysis_result = json.loads(llm_response)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM JSON response: {e}")
-            logger.error(f"Raw response: {llm_response}")
-            raise LLMAnalysisError(f"Invalid JSON response from LLM: {e}")
-
-        # Validate required fields
-        required_fields = ['disclosure_found', 'disclosure_location', 'content_intent', 'confidence_score', 'reasoning']
-        for field in required_fields:
-            if field not in analysis_result:
-                raise LLMAnalysisError(f"Missing required field in LLM response: {field}")
-
-        # Validate field types and values
-        if not isinstance(analysis_result['disclosure_found'], bool):
-            raise LLMAnalysisError("disclosure_found must be a boolean")
-
-        valid_locations = ['beginning', 'middle', 'end', 'nowhere']
-        if analysis_result['disclosure_location'] not in valid_locations:
-            raise LLMAnalysisError(f"disclosure_location must be one of: {valid_locations}")
-
-        valid_intents = ['informative', 'persuasive', 'mixed']
-        if analysis_result['content_intent'] not in valid_intents:
-            raise LLMAnalysisError(f"content_intent must be one of: {valid_intents}")
-
-        confidence = analysis_result['confidence_score']
-        if not isinstance(confidence, (int, float)) or confidence < 0.0 or confidence > 1.0:
-            raise LLMAnalysisError("confidence_score must be a float between 0.0 and 1.0")
+            # Parse JSON response from LLM
+            analysis_result = _parse_llm_json(llm_response)
+
+        # Validate required fields, types and values
+        _validate_analysis(analysis_result)
 
         # Return structured result
-        return {
-            'disclosure_found': analysis_result['disclosure_found'],
-            'disclosure_location': analysis_result['disclosure_location'],
-            'content_intent': analysis_result['content_intent'],
-            'confidence_score': float(confidence),
+        result = {
+            **{field: analysis_result[field] for field in _REQUIRED_FIELDS[:3]},
+            'confidence_score': float(analysis_result['confidence_score']),
             'llm_analysis_raw': analysis_result['reasoning'],
             'provider_used': 'multiple' if len(available_providers) > 1 else available_providers[0]
         }
+        _llm_cache_set(cache_key, result)
+        if embedding is not None:
+            _semantic_cache.add(cache_namespace, embedding, result)
+        result['cache_hit'] = False
+        return result
 
     except requests.exceptions.Timeout:
         error_msg = "LLM API request timed out"
@@ -302,7 +828,7 @@ if __name__ == "__main__":
 
         try:
             print("\n🧪 Testing analysis with sample text...")
-            result = analyze_with_llm(sample_text)
+            result = asyncio.run(analyze_with_llm(sample_text))
             print("✅ Analysis Result:")
             print(json.dumps(result, indent=2))
         except LLMAnalysisError as e:
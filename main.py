@@ -1,15 +1,57 @@
-from fastapi import FastAPI
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import asyncio
+import hashlib
+import importlib.util
+import os
 import re
+import time
 import uuid
+import zlib
+
+from semantic_cache import shared_cache
+
+# Try to import selectolax for fast text extraction, but provide fallback
+try:
+    from selectolax.parser import HTMLParser
+
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+# orjson serializes responses faster; ORJSONResponse imports it itself, so only check it is installed
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+
+# Try to import blake3 for faster page hashing, but provide fallback
+try:
+    from blake3 import blake3
+
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# Regexes for the fallback text extraction, compiled once at import
+_BOILERPLATE_RE = re.compile(
+    r'<(script|style|noscript|svg|template)\b.*?</\1\s*>|<!--.*?-->',
+    re.IGNORECASE | re.DOTALL
+)
+_TAG_RE = re.compile(r'<[^<]+?>')
+_WS_RE = re.compile(r'\s+')
+_BRACE_RE = re.compile(r'{(.*?)}')
+_CDATA_RE = re.compile(r'//<!\[CDATA\[(.*?)//\]\]>')
 
 # Import analysis modules
 try:
     from affiliate_scanner import find_affiliate_links
-    from llm_analysis import analyze_with_llm
+    from llm_analysis import analyze_with_llm, start_llm_batching, stop_llm_batching
     from score_aggregator import calculate_trust_score
 except ImportError:
     # Fallback for development if modules aren't available yet
@@ -17,15 +59,87 @@ except ImportError:
         return {"affiliate_links": [], "count": 0}
 
 
-    def analyze_with_llm(text):
+    async def analyze_with_llm(text, fingerprint=None):
         return {"sentiment": "neutral", "key_issues": []}
 
 
-    def calculate_trust_score(affiliate_data, llm_data):
+    def start_llm_batching():
+        pass
+
+
+    async def stop_llm_batching():
+        pass
+
+
+    def calculate_trust_score(affiliate_data, llm_data, include_analysis=True):
         return {"trust_score": "yellow", "reasons": ["Development mode"]}
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the LLM micro-batching worker and the CPU worker pool for the lifetime of the server"""
+    # HTML cleaning and affiliate scanning are CPU-bound, so they run in worker processes
+    app.state.pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    start_llm_batching()
+    yield
+    await stop_llm_batching()
+    app.state.pool.shutdown()
+
+
+# Largest request body accepted after gzip decompression, a few KB of gzip can expand to gigabytes
+MAX_DECOMPRESSED_BODY_BYTES = 32 * 1024 * 1024
+
+
+def _gunzip_body(body: bytes) -> bytes:
+    """Decompress a gzip request body, never producing more than MAX_DECOMPRESSED_BODY_BYTES"""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, MAX_DECOMPRESSED_BODY_BYTES)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Invalid gzip request body")
+
+    if decompressor.unconsumed_tail:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Decompressed request body exceeds {MAX_DECOMPRESSED_BODY_BYTES} bytes"
+        )
+    if not decompressor.eof:
+        raise HTTPException(status_code=400, detail="Invalid gzip request body")
+    return data
+
+
+class GzipRequest(Request):
+    """Request whose body is decompressed when sent with Content-Encoding: gzip"""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                body = _gunzip_body(body)
+            self._body = body
+        return self._body
+
+
+class GzipRoute(APIRoute):
+    """Route that hands its endpoint a GzipRequest, so large HTML payloads can be sent compressed"""
+
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def gzip_route_handler(request: Request):
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return gzip_route_handler
+
+
 # Create FastAPI app instance
-app = FastAPI(title="TruthSignal API", version="1.0.0")
+app = FastAPI(
+    title="TruthSignal API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+)
+app.router.route_class = GzipRoute
 
 # Include CORS middleware to allow requests from browser extensions
 # Allow all origins for development
@@ -45,33 +159,128 @@ class AnalysisRequest(BaseModel):
     user_credentials: Optional[dict] = None
 
 
+class CacheStatus(BaseModel):
+    exact: bool = False  # Identical page HTML seen before
+    semantic: bool = False  # Near-duplicate page text seen before
+    llm: bool = False  # LLM analysis served from the analysis cache
+
+
 class AnalysisResponse(BaseModel):
     trust_score: str  # "red", "yellow", "green"
     reasons: List[str]
     scan_id: str
     analysis_timestamp: str
+    cache_hit: bool = False  # Served from any of the caches below
+    cache: CacheStatus = Field(default_factory=CacheStatus)
+
+
+class BatchAnalysisRequest(BaseModel):
+    items: List[AnalysisRequest]
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str  # "PENDING", "PROCESSING", "PROCESSED"
+    results: Optional[List[AnalysisResponse]] = None  # In item order, once processed
+
+
+# Items of one batch analyzed at the same time
+BATCH_CONCURRENCY = 8
+
+# Batches kept for polling; the oldest finished ones are dropped first, running ones are never dropped
+MAX_STORED_BATCHES = 1000
+_batches: "OrderedDict[str, BatchStatusResponse]" = OrderedDict()
+
+# Queued or running batches accepted at once, new batches beyond it are refused with 503
+MAX_BATCHES_IN_PROGRESS = 100
+BATCH_RETRY_AFTER_SECONDS = 5
+_batches_in_progress = 0
+
+# Scores of recently analyzed pages: exact HTML first, then near-duplicate text
+PAGE_CACHE_MAXSIZE = 10_000
+PAGE_CACHE_TTL_SECONDS = 3600
+_page_exact_cache: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+_page_cache = shared_cache()
 
 
 def extract_clean_text(html_content: str) -> str:
     """
     Extract clean text from HTML content by removing tags and basic cleaning
+    Not cached: repeat pages stop at the exact page cache before extraction runs
     """
     if not html_content:
         return ""
 
+    if SELECTOLAX_AVAILABLE:
+        # One C-level parse; script/style subtrees are dropped instead of leaking into the text
+        tree = HTMLParser(html_content)
+        for node in tree.css('script, style, noscript, svg, template'):
+            node.decompose()
+        text = tree.body.text(separator=' ', strip=True) if tree.body else ''
+        return ' '.join(text.split())
+
+    # Drop invisible elements with their content (JS, CSS, inline SVG) and comments
+    clean_text = _BOILERPLATE_RE.sub(' ', html_content)
+
     # Remove HTML tags
-    clean_text = re.sub('<[^<]+?>', ' ', html_content)
+    clean_text = _TAG_RE.sub(' ', clean_text)
 
-    # Remove extra whitespace and newlines - use raw string for regex
-    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+    # Remove extra whitespace and newlines
+    clean_text = _WS_RE.sub(' ', clean_text).strip()
 
     # Remove common script and style content that might slip through
-    clean_text = re.sub(r'{(.*?)}', '', clean_text)
-    clean_text = re.sub(r'//<!\[CDATA\[(.*?)//\]\]>', '', clean_text)
+    clean_text = _BRACE_RE.sub('', clean_text)
+    clean_text = _CDATA_RE.sub('', clean_text)
 
     return clean_text
 
 
+def _page_exact_key(html_content: str) -> str:
+    """
+    Hash of the page HTML with whitespace collapsed
+    Scripts stay in, they can carry the affiliate URLs the scan counts
+    """
+    normalized = ' '.join(html_content.split()).encode('utf-8')
+    if BLAKE3_AVAILABLE:
+        return blake3(normalized).hexdigest()
+    return hashlib.blake2b(normalized, digest_size=32).hexdigest()
+
+
+def _page_exact_get(key: str) -> Optional[dict]:
+    """Return the stored score of an identical page, or None if missing or expired"""
+    entry = _page_exact_cache.get(key)
+    if entry is None:
+        return None
+
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        del _page_exact_cache[key]
+        return None
+
+    _page_exact_cache.move_to_end(key)
+    return result
+
+
+def _page_exact_set(key: str, result: dict) -> None:
+    """Store a page score, evicting the least recently used entries beyond the size limit"""
+    _page_exact_cache[key] = (time.monotonic() + PAGE_CACHE_TTL_SECONDS, result)
+    _page_exact_cache.move_to_end(key)
+    while len(_page_exact_cache) > PAGE_CACHE_MAXSIZE:
+        _page_exact_cache.popitem(last=False)
+
+
+def _discard_task(task: asyncio.Task) -> None:
+    """Cancel a task whose result is no longer needed, without an unretrieved-exception warning"""
+    task.cancel()
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+
+def _page_cache_namespace(affiliate_data: dict) -> str:
+    """Affiliate findings a cached page score is only valid for"""
+    networks = ','.join(sorted(affiliate_data.get("affiliate_networks", [])))
+    return f"{affiliate_data.get('total_affiliate_links', 0)}|{networks}"
+
+
 @app.get("/")
 async def root():
     """Root endpoint to verify API is running"""
@@ -79,9 +288,19 @@ async def root():
 
 
 @app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_website(request: AnalysisRequest):
+async def analyze_website(request: AnalysisRequest, response: Response):
     """
     Analyze website content for trustworthiness
+    X-Cache tells whether the result came from a cache
+    """
+    result = await _analyze_page(request)
+    response.headers["X-Cache"] = "HIT" if result.cache_hit else "MISS"
+    return result
+
+
+async def _analyze_page(request: AnalysisRequest) -> AnalysisResponse:
+    """
+    Analyze one page for trustworthiness
 
     Integrates three analysis modules:
     1. Affiliate link scanner
@@ -102,24 +321,68 @@ async def analyze_website(request: AnalysisRequest):
                 analysis_timestamp=analysis_timestamp
             )
 
-        # Step 1: Extract clean text from HTML
-        cleaned_text = extract_clean_text(request.html_content)
+        # Identical pages (repeat submissions) skip every step
+        exact_key = _page_exact_key(request.html_content)
+        cached = _page_exact_get(exact_key)
+        if cached is not None:
+            return AnalysisResponse(
+                trust_score=cached["trust_score"],
+                reasons=list(cached["reasons"]),
+                scan_id=scan_id,
+                analysis_timestamp=analysis_timestamp,
+                cache_hit=True,
+                cache=CacheStatus(exact=True)
+            )
 
-        # Step 2: Analyze affiliate links
-        try:
-            affiliate_data = find_affiliate_links(request.html_content)
-        except Exception as e:
-            affiliate_data = {"error": f"Affiliate analysis failed: {str(e)}"}
+        # CPU-bound steps run in the worker pool (the default thread pool if the lifespan did not run)
+        loop = asyncio.get_running_loop()
+        pool = getattr(app.state, 'pool', None)
+
+        # Step 2: Start the affiliate link scan, it runs alongside the steps below
+        affiliate_future = loop.run_in_executor(pool, find_affiliate_links, request.html_content)
+
+        # Step 1: Extract clean text from HTML
+        cleaned_text = await loop.run_in_executor(pool, extract_clean_text, request.html_content)
+
+        # Fingerprint the text once for both near-duplicate tiers
+        fingerprint_task = asyncio.ensure_future(asyncio.to_thread(_page_cache.fingerprint, cleaned_text))
+
+        # Step 3: Start the LLM analysis, it only needs the text and runs while the scan finishes
+        llm_task = asyncio.create_task(analyze_with_llm(cleaned_text, fingerprint=fingerprint_task))
+
+        affiliate_data, fingerprint = await asyncio.gather(affiliate_future, fingerprint_task, return_exceptions=True)
+
+        if isinstance(affiliate_data, Exception):
+            affiliate_data = {"error": f"Affiliate analysis failed: {str(affiliate_data)}"}
+
+        # Near-duplicate text with the same affiliate findings scores the same, drop the LLM analysis
+        page_cache_namespace = None
+        if "error" not in affiliate_data and not isinstance(fingerprint, Exception):
+            page_cache_namespace = _page_cache_namespace(affiliate_data)
+            cached = _page_cache.get(page_cache_namespace, fingerprint)
+            if cached is not None:
+                _discard_task(llm_task)
+                _page_exact_set(exact_key, cached)
+                return AnalysisResponse(
+                    trust_score=cached["trust_score"],
+                    reasons=list(cached["reasons"]),
+                    scan_id=scan_id,
+                    analysis_timestamp=analysis_timestamp,
+                    cache_hit=True,
+                    cache=CacheStatus(semantic=True)
+                )
 
-        # Step 3: Analyze content with LLM
         try:
-            llm_data = analyze_with_llm(cleaned_text)
+            llm_data = await llm_task
         except Exception as e:
             llm_data = {"error": f"LLM analysis failed: {str(e)}"}
 
+        cache_hit = bool(llm_data.get("cache_hit", False)) if isinstance(llm_data, dict) else False
+
         # Step 4: Calculate final trust score
         try:
-            trust_result = calculate_trust_score(affiliate_data, llm_data)
+            # The response only carries the score and reasons, so skip the analysis summary
+            trust_result = calculate_trust_score(affiliate_data, llm_data, include_analysis=False)
 
             # Ensure we have the expected structure
             if isinstance(trust_result, dict) and "trust_score" in trust_result:
@@ -140,12 +403,18 @@ async def analyze_website(request: AnalysisRequest):
                 reasons.append("Partial analysis: Affiliate scanning issues")
             if "error" in str(llm_data):
                 reasons.append("Partial analysis: LLM analysis issues")
+        elif page_cache_namespace is not None:
+            page_result = {"trust_score": trust_score, "reasons": tuple(reasons)}
+            _page_exact_set(exact_key, page_result)
+            _page_cache.add(page_cache_namespace, fingerprint, page_result)
 
         return AnalysisResponse(
             trust_score=trust_score,
             reasons=reasons,
             scan_id=scan_id,
-            analysis_timestamp=analysis_timestamp
+            analysis_timestamp=analysis_timestamp,
+            cache_hit=cache_hit,
+            cache=CacheStatus(llm=cache_hit)
         )
 
     except Exception as e:
@@ -159,6 +428,69 @@ async def analyze_website(request: AnalysisRequest):
         )
 
 
+def _evict_finished_batches():
+    """Drop the oldest processed batches while more than MAX_STORED_BATCHES are stored"""
+    excess = len(_batches) - MAX_STORED_BATCHES
+    if excess <= 0:
+        return
+    finished = [batch_id for batch_id, batch in _batches.items() if batch.status == "PROCESSED"]
+    for batch_id in finished[:excess]:
+        del _batches[batch_id]
+
+
+async def _process_batch(batch: BatchStatusResponse, items: List[AnalysisRequest]):
+    """Analyze the items of a batch with bounded concurrency and store the results"""
+    global _batches_in_progress
+    batch.status = "PROCESSING"
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def analyze_item(item: AnalysisRequest) -> AnalysisResponse:
+        async with semaphore:
+            return await _analyze_page(item)
+
+    try:
+        # _analyze_page turns every failure into a yellow response, so gather never raises here
+        batch.results = await asyncio.gather(*(analyze_item(item) for item in items))
+        batch.status = "PROCESSED"
+    finally:
+        _batches_in_progress -= 1
+
+
+@app.post("/analyze/batch", response_model=BatchStatusResponse)
+async def analyze_batch(request: BatchAnalysisRequest, background_tasks: BackgroundTasks):
+    """
+    Queue several pages for analysis in one call
+
+    Returns a batch ID to poll with GET /batch/{batch_id}
+    """
+    global _batches_in_progress
+    # Unfinished batches are never evicted, so their number is capped here to keep _batches bounded
+    if _batches_in_progress >= MAX_BATCHES_IN_PROGRESS:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Too many batches in progress ({MAX_BATCHES_IN_PROGRESS}), retry later",
+            headers={"Retry-After": str(BATCH_RETRY_AFTER_SECONDS)}
+        )
+
+    batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+    batch = BatchStatusResponse(batch_id=batch_id, status="PENDING")
+
+    _batches[batch_id] = batch
+    _batches_in_progress += 1
+    _evict_finished_batches()
+
+    background_tasks.add_task(_process_batch, batch, request.items)
+    return batch
+
+
+@app.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch(batch_id: str):
+    """Status of a batch, with the results once it is processed"""
+    batch = _batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
+    return batch
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -173,4 +505,4 @@ if __name__ == "__main__":
 #
 # --reload enables auto-reload during development
 # --host 0.0.0.0 makes it accessible on your network
-# --port 8000 sets the port (default is 8000)
\ No newline at end of file
+# --port 8000 sets the port (default is 8000)
@@ -5,6 +5,7 @@ Quick test to verify affiliate scanner is working
 
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Make sure we can import the module
 sys.path.insert(0, os.path.dirname(__file__))
@@ -18,6 +19,43 @@ except ImportError as e:
     sys.exit(1)
 
 
+def _run_one(i, test):
+    """Run one test case, returning (passed, printed output)"""
+    lines = [f"\nTest {i}: {test['name']}", "-" * 40]
+
+    try:
+        result = find_affiliate_links(test['html'])
+
+        # Check if affiliate links were found as expected
+        if result['affiliate_links_found'] != test['should_find']:
+            lines.append(
+                f"❌ FAIL: Expected affiliate_links_found={test['should_find']}, but got {result['affiliate_links_found']}")
+            return False, "\n".join(lines) + "\n"
+
+        lines.append(f"✅ Found affiliate links: {result['affiliate_links_found']} (expected: {test['should_find']})")
+
+        # Check networks if links were found
+        if result['affiliate_links_found']:
+            lines.append(f"   Networks: {result['affiliate_networks']}")
+            lines.append(f"   Total links: {result['total_affiliate_links']}")
+            if result['details']:
+                lines.append(f"   Sample: {result['details'][0]}")
+
+            # Verify expected networks
+            if set(result['affiliate_networks']) == set(test['expected_networks']):
+                lines.append(f"✅ Correct networks detected")
+            else:
+                lines.append(
+                    f"❌ Network mismatch. Expected: {test['expected_networks']}, Got: {result['affiliate_networks']}")
+                return False, "\n".join(lines) + "\n"
+
+        return True, "\n".join(lines) + "\n"
+
+    except Exception as e:
+        lines.append(f"❌ ERROR during test: {e}")
+        return False, "\n".join(lines) + "\n"
+
+
 def run_basic_tests():
     """Run basic functionality tests"""
     print("\n" + "=" * 60)
@@ -63,46 +101,15 @@ def run_basic_tests():
         }
     ]
 
-    passed = 0
-    failed = 0
-
-    for i, test in enumerate(test_cases, 1):
-        print(f"\nTest {i}: {test['name']}")
-        print("-" * 40)
-
-        try:
-            result = find_affiliate_links(test['html'])
-
-            # Check if affiliate links were found as expected
-            if result['affiliate_links_found'] == test['should_find']:
-                print(f"✅ Found affiliate links: {result['affiliate_links_found']} (expected: {test['should_find']})")
+    # Cases are independent, so they run concurrently; output is printed afterwards in case order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_run_one, range(1, len(test_cases) + 1), test_cases))
 
-                # Check networks if links were found
-                if result['affiliate_links_found']:
-                    print(f"   Networks: {result['affiliate_networks']}")
-                    print(f"   Total links: {result['total_affiliate_links']}")
-                    if result['details']:
-                        print(f"   Sample: {result['details'][0]}")
-
-                    # Verify expected networks
-                    if set(result['affiliate_networks']) == set(test['expected_networks']):
-                        print(f"✅ Correct networks detected")
-                    else:
-                        print(
-                            f"❌ Network mismatch. Expected: {test['expected_networks']}, Got: {result['affiliate_networks']}")
-                        failed += 1
-                        continue
-
-                passed += 1
-
-            else:
-                print(
-                    f"❌ FAIL: Expected affiliate_links_found={test['should_find']}, but got {result['affiliate_links_found']}")
-                failed += 1
+    for _, output in results:
+        print(output, end="")
 
-        except Exception as e:
-            print(f"❌ ERROR during test: {e}")
-            failed += 1
+    passed = sum(1 for ok, _ in results if ok)
+    failed = len(results) - passed
 
     print("\n" + "=" * 60)
     print("TEST SUMMARY")
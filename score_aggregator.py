@@ -3,113 +3,329 @@ Score Aggregator Module for TruthSignal
 Combines affiliate scanner and LLM analysis to generate trust scores.
 """
 
-from typing import Dict, List
-
-
-def calculate_trust_score(affiliate_data: dict, llm_data: dict) -> dict:
-    """
-    Calculate trust score based on affiliate links and LLM analysis results.
-
-    Args:
-        affiliate_data: Dictionary from affiliate_scanner.py containing:
-            - affiliate_links_count: int
-            - affiliate_domains: list
-            - total_links: int
-            - affiliate_ratio: float
-
-        llm_data: Dictionary from llm_analysis.py containing:
-            - disclosure_found: bool
-            - disclosure_location: str ("beginning", "middle", "end", "nowhere")
-            - content_intent: str ("informative", "persuasive", "mixed")
-            - confidence_score: float
-            - llm_analysis_raw: str
-
-    Returns:
-        Dictionary containing:
-            - trust_score: "red", "yellow", "green"
-            - reasons: list of human-readable explanations
-            - final_analysis: combined insights summary
-    """
-
-    # Extract key metrics with safe defaults
-    affiliate_count = affiliate_data.get('affiliate_links_count', 0)
-    disclosure_found = llm_data.get('disclosure_found', False)
-    disclosure_location = llm_data.get('disclosure_location', 'nowhere')
-    content_intent = llm_data.get('content_intent', 'informative')
-
-    reasons = []
-    trust_score = "green"  # Start with baseline green
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple, Union
+
+# Try to import numpy for batch scoring, but provide fallback
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+@dataclass(slots=True, frozen=True)
+class AffiliateResult:
+    """Affiliate scanner fields the score depends on"""
+    affiliate_links_count: int = 0
+    affiliate_domains: Tuple[str, ...] = ()
+    total_links: int = 0
+    affiliate_ratio: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AffiliateResult":
+        """Build from a scanner dict, ignoring the keys scoring does not use"""
+        return cls(
+            affiliate_links_count=data.get('affiliate_links_count', 0),
+            affiliate_domains=tuple(data.get('affiliate_domains', ())),
+            total_links=data.get('total_links', 0),
+            affiliate_ratio=data.get('affiliate_ratio', 0.0)
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class LLMResult:
+    """LLM analysis fields the score depends on"""
+    disclosure_found: bool = False
+    disclosure_location: str = 'nowhere'
+    content_intent: str = 'informative'
+    confidence_score: float = 0.0
+    llm_analysis_raw: str = ''
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LLMResult":
+        """Build from an analysis dict, ignoring the keys scoring does not use"""
+        return cls(
+            disclosure_found=data.get('disclosure_found', False),
+            disclosure_location=data.get('disclosure_location', 'nowhere'),
+            content_intent=data.get('content_intent', 'informative'),
+            confidence_score=data.get('confidence_score', 0.0),
+            llm_analysis_raw=data.get('llm_analysis_raw', '')
+        )
+
+
+# Bits of the scoring mask, one per condition the rules below look at
+_VERY_HIGH_COUNT = 1 << 0  # affiliate_count > 5
+_HIGH_COUNT = 1 << 1  # affiliate_count > 3
+_MEDIUM_COUNT = 1 << 2  # 1 <= affiliate_count <= 3
+_ANY_LINKS = 1 << 3  # affiliate_count > 0
+_UNDISCLOSED = 1 << 4
+_PERSUASIVE = 1 << 5
+_MIXED = 1 << 6
+_AT_BEGINNING = 1 << 7
+_MIDDLE_OR_END = 1 << 8
+
+# Scores are small ints in the table, named only when handed to callers
+_GREEN, _YELLOW, _RED = range(3)
+_SCORE_NAMES = ('green', 'yellow', 'red')
+
+# Integer codes of the LLM fields for batch scoring; unknown codes match no rule, like unknown strings
+LOCATION_CODES = {'nowhere': 0, 'beginning': 1, 'middle': 2, 'end': 3}
+INTENT_CODES = {'informative': 0, 'persuasive': 1, 'mixed': 2}
+_LOCATION_NAMES = tuple(LOCATION_CODES)
+_INTENT_NAMES = tuple(INTENT_CODES)
+
+
+def _score_rule(mask: int) -> Tuple[int, Tuple[str, ...]]:
+    """Apply the red/yellow/green rules to one mask, giving the score and reason templates"""
+    disclosed = not mask & _UNDISCLOSED
 
     # RED CONDITIONS (highest priority - any of these trigger red)
     red_conditions = []
 
     # Condition 1: High affiliate links (>3) AND no disclosure found
-    if affiliate_count > 3 and not disclosure_found:
-        red_conditions.append(f"High number of affiliate links ({affiliate_count}) with no disclosure")
+    if mask & _HIGH_COUNT and not disclosed:
+        red_conditions.append("High number of affiliate links ({count}) with no disclosure")
 
     # Condition 2: Content intent is "persuasive" AND no disclosure found
-    if content_intent == "persuasive" and not disclosure_found:
+    if mask & _PERSUASIVE and not disclosed:
         red_conditions.append('Persuasive sales content with no disclosure')
 
     # Condition 3: High affiliate links (>5) regardless of disclosure
-    if affiliate_count > 5:
-        red_conditions.append(f"Very high number of affiliate links ({affiliate_count})")
+    if mask & _VERY_HIGH_COUNT:
+        red_conditions.append("Very high number of affiliate links ({count})")
 
-    # If any red conditions met, return red immediately
     if red_conditions:
-        return {
-            'trust_score': 'red',
-            'reasons': red_conditions,
-            'final_analysis': _generate_final_analysis(affiliate_data, llm_data, 'red', red_conditions)
-        }
+        return _RED, tuple(red_conditions)
 
     # YELLOW CONDITIONS (medium priority)
     yellow_conditions = []
 
     # Condition 1: Medium affiliate links (1-3) AND no disclosure
-    if 1 <= affiliate_count <= 3 and not disclosure_found:
-        yellow_conditions.append(f"Medium affiliate links ({affiliate_count}) with no disclosure")
+    if mask & _MEDIUM_COUNT and not disclosed:
+        yellow_conditions.append("Medium affiliate links ({count}) with no disclosure")
 
     # Condition 2: Content intent is "mixed" AND no disclosure
-    if content_intent == "mixed" and not disclosure_found:
+    if mask & _MIXED and not disclosed:
         yellow_conditions.append('Mixed content intent with no disclosure')
 
     # Condition 3: Any affiliate links with disclosure at end/middle (not beginning)
-    if affiliate_count > 0 and disclosure_found and disclosure_location in ['middle', 'end']:
-        yellow_conditions.append(f'Affiliate links with disclosure at {disclosure_location} (not beginning)')
+    if mask & _ANY_LINKS and disclosed and mask & _MIDDLE_OR_END:
+        yellow_conditions.append('Affiliate links with disclosure at {location} (not beginning)')
 
-    # If any yellow conditions met, return yellow
     if yellow_conditions:
-        return {
-            'trust_score': 'yellow',
-            'reasons': yellow_conditions,
-            'final_analysis': _generate_final_analysis(affiliate_data, llm_data, 'yellow', yellow_conditions)
-        }
+        return _YELLOW, tuple(yellow_conditions)
 
     # GREEN CONDITIONS
     green_conditions = []
 
     # Condition 1: No affiliate links
-    if affiliate_count == 0:
+    if not mask & _ANY_LINKS:
         green_conditions.append('No affiliate links detected')
 
     # Condition 2: Clear disclosure at beginning regardless of affiliate count
-    if disclosure_found and disclosure_location == 'beginning':
-        green_conditions.append(f'Clear disclosure at beginning with {affiliate_count} affiliate links')
+    if disclosed and mask & _AT_BEGINNING:
+        green_conditions.append('Clear disclosure at beginning with {count} affiliate links')
 
     # If we reach here, it's green (either no affiliate links or proper disclosure)
     if not green_conditions:
         # Fallback green condition - should rarely hit this
         green_conditions.append('Minimal risk factors detected')
 
-    return {
-        'trust_score': 'green',
-        'reasons': green_conditions,
-        'final_analysis': _generate_final_analysis(affiliate_data, llm_data, 'green', green_conditions)
+    return _GREEN, tuple(green_conditions)
+
+
+# Every combination of conditions resolved once at import; scoring is a mask lookup
+_SCORE_TABLE: Tuple[Tuple[int, Tuple[str, ...]], ...] = tuple(_score_rule(mask) for mask in range(1 << 9))
+
+
+def _score_mask(affiliate_count: int, disclosed: bool, location: str, intent: str) -> int:
+    """Mask of the conditions that hold for the four scoring inputs"""
+    return (
+        (affiliate_count > 5) * _VERY_HIGH_COUNT
+        | (affiliate_count > 3) * _HIGH_COUNT
+        | (1 <= affiliate_count <= 3) * _MEDIUM_COUNT
+        | (affiliate_count > 0) * _ANY_LINKS
+        | (not disclosed) * _UNDISCLOSED
+        | (intent == 'persuasive') * _PERSUASIVE
+        | (intent == 'mixed') * _MIXED
+        | (location == 'beginning') * _AT_BEGINNING
+        | (location in ('middle', 'end')) * _MIDDLE_OR_END
+    )
+
+
+if NUMPY_AVAILABLE:
+    _SCORE_CODE_ARRAY = np.array([score_code for score_code, _ in _SCORE_TABLE], dtype=np.int8)
+    _SCORE_NAME_ARRAY = np.array(_SCORE_NAMES)
+
+
+@lru_cache(maxsize=4096)
+def _score_core(affiliate_count: int, disclosed: bool, location: str, intent: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Score and formatted reasons for the four inputs the rules depend on
+    Cached, since re-submitted pages score the same inputs again
+    """
+    score_code, templates = _SCORE_TABLE[_score_mask(affiliate_count, disclosed, location, intent)]
+
+    # Only a few templates carry placeholders, the rest are used as-is
+    reasons = tuple(
+        template.format(count=affiliate_count, location=location) if '{' in template else template
+        for template in templates
+    )
+    return _SCORE_NAMES[score_code], reasons
+
+
+def calculate_trust_score(affiliate_data: Union[AffiliateResult, dict], llm_data: Union[LLMResult, dict],
+                          include_analysis: bool = True, lazy_analysis: bool = False) -> dict:
+    """
+    Calculate trust score based on affiliate links and LLM analysis results.
+
+    Args:
+        affiliate_data: AffiliateResult, or a dictionary from affiliate_scanner.py containing:
+            - affiliate_links_count: int
+            - affiliate_domains: list
+            - total_links: int
+            - affiliate_ratio: float
+
+        llm_data: LLMResult, or a dictionary from llm_analysis.py containing:
+            - disclosure_found: bool
+            - disclosure_location: str ("beginning", "middle", "end", "nowhere")
+            - content_intent: str ("informative", "persuasive", "mixed")
+            - confidence_score: float
+            - llm_analysis_raw: str
+
+        include_analysis: Build the final_analysis summary (presentation only)
+        lazy_analysis: Defer building the summary until it is first converted with str();
+            final_analysis is then not a str, so only for callers that only print or str() it
+
+    Returns:
+        Dictionary containing:
+            - trust_score: "red", "yellow", "green"
+            - reasons: list of human-readable explanations
+            - final_analysis: combined insights summary (only with include_analysis)
+    """
+
+    # Dict payloads are still accepted while callers migrate; missing keys take the field defaults
+    if isinstance(affiliate_data, dict):
+        affiliate_data = AffiliateResult.from_dict(affiliate_data)
+    if isinstance(llm_data, dict):
+        llm_data = LLMResult.from_dict(llm_data)
+
+    trust_score, reasons = _score_core(
+        affiliate_data.affiliate_links_count,
+        bool(llm_data.disclosure_found),
+        llm_data.disclosure_location,
+        llm_data.content_intent
+    )
+
+    # Callers extend the reasons, so each result gets its own list
+    result = {
+        'trust_score': trust_score,
+        'reasons': list(reasons)
     }
+    if include_analysis and lazy_analysis:
+        result['final_analysis'] = _LazyAnalysis(affiliate_data, llm_data, trust_score, reasons)
+    elif include_analysis:
+        result['final_analysis'] = _generate_final_analysis(affiliate_data, llm_data, trust_score, reasons)
+    return result
 
 
-def _generate_final_analysis(affiliate_data: dict, llm_data: dict, score: str, reasons: List[str]) -> str:
+def calculate_trust_score_batch(affiliate_counts: Sequence[int], disclosure_found: Sequence[bool],
+                                locations: Sequence[int], intents: Sequence[int]) -> Dict[str, Sequence]:
+    """
+    Score many analyses at once from column arrays, one entry per page.
+
+    Args:
+        affiliate_counts: affiliate link count per page
+        disclosure_found: whether the LLM found a disclosure, per page
+        locations: disclosure location per page, encoded with LOCATION_CODES
+        intents: content intent per page, encoded with INTENT_CODES
+
+    Returns:
+        Dictionary containing:
+            - trust_score: "red", "yellow", "green" per page
+            - score_code: 0 (green), 1 (yellow), 2 (red) per page
+
+        numpy arrays when numpy is installed, lists otherwise.
+        Reasons are per page text; use calculate_trust_score for those.
+    """
+    if not NUMPY_AVAILABLE:
+        codes = [
+            _SCORE_TABLE[_score_mask(
+                count,
+                bool(disclosed),
+                _LOCATION_NAMES[location] if 0 <= location < len(_LOCATION_NAMES) else None,
+                _INTENT_NAMES[intent] if 0 <= intent < len(_INTENT_NAMES) else None
+            )][0]
+            for count, disclosed, location, intent in zip(affiliate_counts, disclosure_found, locations, intents)
+        ]
+        return {'trust_score': [_SCORE_NAMES[code] for code in codes], 'score_code': codes}
+
+    counts = np.asarray(affiliate_counts)
+    disclosed = np.asarray(disclosure_found, dtype=bool)
+    locations = np.asarray(locations)
+    intents = np.asarray(intents)
+
+    # Same conditions as _score_mask, one vectorized comparison per bit
+    masks = (
+        (counts > 5) * _VERY_HIGH_COUNT
+        | (counts > 3) * _HIGH_COUNT
+        | ((counts >= 1) & (counts <= 3)) * _MEDIUM_COUNT
+        | (counts > 0) * _ANY_LINKS
+        | ~disclosed * _UNDISCLOSED
+        | (intents == INTENT_CODES['persuasive']) * _PERSUASIVE
+        | (intents == INTENT_CODES['mixed']) * _MIXED
+        | (locations == LOCATION_CODES['beginning']) * _AT_BEGINNING
+        | ((locations == LOCATION_CODES['middle']) | (locations == LOCATION_CODES['end'])) * _MIDDLE_OR_END
+    )
+    codes = _SCORE_CODE_ARRAY[masks]
+    return {'trust_score': _SCORE_NAME_ARRAY[codes], 'score_code': codes}
+
+
+class _LazyAnalysis:
+    """Final analysis text, generated the first time it is converted to a string"""
+    __slots__ = ('_args', '_cached')
+
+    def __init__(self, affiliate_data: AffiliateResult, llm_data: LLMResult, score: str, reasons: Tuple[str, ...]):
+        self._args = (affiliate_data, llm_data, score, reasons)
+        self._cached = None
+
+    def __str__(self) -> str:
+        if self._cached is None:
+            self._cached = _generate_final_analysis(*self._args)
+        return self._cached
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, _LazyAnalysis):
+            other = str(other)
+        return str(self) == other
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+# Layout of the final analysis; optional lines are passed in already formatted or empty
+_ANALYSIS_TEMPLATE = (
+    "Trust Score: {score}\n"
+    "Primary Factors:{reasons}\n"
+    "\n"
+    "Affiliate Analysis:\n"
+    "  - Affiliate Links: {count}{domains_line}\n"
+    "\n"
+    "Disclosure Analysis:\n"
+    "  - Disclosure Found: {disclosed}{location_line}\n"
+    "  - Content Intent: {intent}\n"
+    "  - Analysis Confidence: {confidence:.1%}{llm_line}"
+)
+
+
+def _generate_final_analysis(affiliate_data: AffiliateResult, llm_data: LLMResult, score: str,
+                             reasons: List[str]) -> str:
     """
     Generate a comprehensive final analysis combining both data sources.
 
@@ -123,44 +339,35 @@ def _generate_final_analysis(affiliate_data: dict, llm_data: dict, score: str, r
         Comprehensive analysis string
     """
 
-    affiliate_count = affiliate_data.get('affiliate_links_count', 0)
-    disclosure_found = llm_data.get('disclosure_found', False)
-    disclosure_location = llm_data.get('disclosure_location', 'nowhere')
-    content_intent = llm_data.get('content_intent', 'informative')
-    confidence = llm_data.get('confidence_score', 0.0)
-
-    analysis_parts = []
-
-    # Add trust score summary
-    analysis_parts.append(f"Trust Score: {score.upper()}")
+    affiliate_count = affiliate_data.affiliate_links_count
+    disclosure_found = llm_data.disclosure_found
+    disclosure_location = llm_data.disclosure_location
 
-    # Add primary reasons
-    analysis_parts.append("Primary Factors:")
-    for reason in reasons:
-        analysis_parts.append(f"  - {reason}")
+    reasons_lines = "".join([f"\n  - {reason}" for reason in reasons])
 
-    # Add affiliate analysis
-    analysis_parts.append("\nAffiliate Analysis:")
-    analysis_parts.append(f"  - Affiliate Links: {affiliate_count}")
+    domains_line = ""
     if affiliate_count > 0:
-        domains = affiliate_data.get('affiliate_domains', [])
+        domains = affiliate_data.affiliate_domains
         if domains:
-            analysis_parts.append(f"  - Affiliate Domains: {', '.join(domains[:3])}{'...' if len(domains) > 3 else ''}")
+            domains_line = f"\n  - Affiliate Domains: {', '.join(domains[:3])}{'...' if len(domains) > 3 else ''}"
 
-    # Add disclosure analysis
-    analysis_parts.append("\nDisclosure Analysis:")
-    analysis_parts.append(f"  - Disclosure Found: {'Yes' if disclosure_found else 'No'}")
-    if disclosure_found:
-        analysis_parts.append(f"  - Disclosure Location: {disclosure_location}")
-    analysis_parts.append(f"  - Content Intent: {content_intent}")
-    analysis_parts.append(f"  - Analysis Confidence: {confidence:.1%}")
+    location_line = f"\n  - Disclosure Location: {disclosure_location}" if disclosure_found else ""
 
-    # Add LLM insights if available
-    llm_raw = llm_data.get('llm_analysis_raw', '')
-    if llm_raw and len(llm_raw) < 500:  # Only include if not too long
-        analysis_parts.append(f"\nLLM Insights: {llm_raw}")
+    # Add LLM insights if available, only if not too long
+    llm_raw = llm_data.llm_analysis_raw
+    llm_line = f"\n\nLLM Insights: {llm_raw}" if llm_raw and len(llm_raw) < 500 else ""
 
-    return "\n".join(analysis_parts)
+    return _ANALYSIS_TEMPLATE.format(
+        score=score.upper(),
+        reasons=reasons_lines,
+        count=affiliate_count,
+        domains_line=domains_line,
+        disclosed='Yes' if disclosure_found else 'No',
+        location_line=location_line,
+        intent=llm_data.content_intent,
+        confidence=llm_data.confidence_score,
+        llm_line=llm_line
+    )
 
 
 # Example usage and testing
@@ -231,4 +438,13 @@ if __name__ == "__main__":
         print("Reasons:")
         for reason in result['reasons']:
             print(f"  - {reason}")
-        print(f"\nFinal Analysis:\n{result['final_analysis']}")
\ No newline at end of file
+        print(f"\nFinal Analysis:\n{result['final_analysis']}")
+
+    # The same three scenarios scored together as columns
+    batch = calculate_trust_score_batch(
+        [aff_data['affiliate_links_count'] for _, aff_data, _ in test_cases],
+        [llm_data['disclosure_found'] for _, _, llm_data in test_cases],
+        [LOCATION_CODES[llm_data['disclosure_location']] for _, _, llm_data in test_cases],
+        [INTENT_CODES[llm_data['content_intent']] for _, _, llm_data in test_cases]
+    )
+    print(f"\nBatch Trust Scores: {list(batch['trust_score'])}")
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Semantic Cache for TruthSignal
+Returns stored results for near-duplicate texts (same article with a different ad slot or timestamp).
+"""
+
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Try to import sentence-transformers for embedding similarity, but provide fallback
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_TTL_SECONDS = 3600
+
+_WORD_RE = re.compile(r'\w+')
+
+
+class NearDuplicateCache:
+    """
+    Base for caches that match texts by fingerprint similarity
+    Entries only match within the namespace they were stored under
+    fingerprint() may run on any thread; get(), add() and lookup() must all run on the same one
+    """
+
+    def fingerprint(self, text: str):
+        """Compute the fingerprint a text is compared by"""
+        raise NotImplementedError
+
+    def get(self, namespace: str, fingerprint) -> Optional[Dict]:
+        """Return a copy of a result stored under a similar fingerprint, or None"""
+        raise NotImplementedError
+
+    def add(self, namespace: str, fingerprint, result: Dict) -> None:
+        """Store a result under its text fingerprint"""
+        raise NotImplementedError
+
+    def lookup(self, namespace: str, text: str) -> Tuple[Optional[Dict], object]:
+        """
+        Find a cached result for a similar text
+        Returns (result or None, fingerprint); pass the fingerprint to add() on a miss
+        """
+        fingerprint = self.fingerprint(text)
+        return self.get(namespace, fingerprint), fingerprint
+
+
+class SemanticCache(NearDuplicateCache):
+    """
+    Matches texts by cosine similarity of sentence-transformers embeddings
+    Returns a stored result when the similarity reaches the threshold
+    """
+
+    def __init__(self, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2',
+                 threshold: float = DEFAULT_THRESHOLD, maxsize: int = 1000,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._model = None
+        self._vectors = []
+        self._entries = []  # (namespace, expires_at, result), parallel to _vectors
+        self._matrix = None
+
+    def fingerprint(self, text: str):
+        """Embed text as a normalized vector, loading the model on first use"""
+        if self._model is None:
+            self._model = SentenceTransformer(self.model_name)
+        return self._model.encode(text, normalize_embeddings=True)
+
+    def get(self, namespace: str, fingerprint) -> Optional[Dict]:
+        """Return a copy of the result stored under the most similar embedding above the threshold"""
+        if not self._vectors:
+            return None
+
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+
+        # Vectors are normalized, so the dot product is the cosine similarity
+        similarities = self._matrix @ fingerprint
+        now = time.monotonic()
+        for index in np.argsort(similarities)[::-1]:
+            if similarities[index] < self.threshold:
+                break
+            entry_namespace, expires_at, result = self._entries[index]
+            if entry_namespace == namespace and expires_at >= now:
+                return dict(result)
+
+        return None
+
+    def add(self, namespace: str, fingerprint, result: Dict) -> None:
+        """Store a result under its text embedding, dropping the oldest beyond maxsize"""
+        self._vectors.append(fingerprint)
+        self._entries.append((namespace, time.monotonic() + self.ttl_seconds, dict(result)))
+        if len(self._vectors) > self.maxsize:
+            del self._vectors[0]
+            del self._entries[0]
+        self._matrix = None
+
+
+class SimHashCache(NearDuplicateCache):
+    """
+    Fallback without sentence-transformers: 64-bit SimHash over word 3-shingles
+    Similarity is the share of matching fingerprint bits
+    """
+
+    # Distinct shingles hashed per text, bounds the cost on very long pages
+    MAX_SHINGLES = 20_000
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, maxsize: int = 1000,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: List[Tuple[str, int, float, Dict]] = []  # (namespace, fingerprint, expires_at, result)
+
+    def fingerprint(self, text: str) -> int:
+        """SimHash of the distinct word 3-shingles of a text"""
+        words = _WORD_RE.findall(text.lower())
+        shingles = {' '.join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+        if len(shingles) > self.MAX_SHINGLES:
+            shingles = set(sorted(shingles)[:self.MAX_SHINGLES])
+
+        # Column-wise bit counts over the shingle hashes as 64-character bit strings
+        bit_rows = [
+            format(int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+            for shingle in shingles
+        ]
+        if not bit_rows:
+            return 0
+
+        half = len(bit_rows) / 2
+        fingerprint = 0
+        for column in zip(*bit_rows):
+            fingerprint = (fingerprint << 1) | (column.count('1') > half)
+        return fingerprint
+
+    def get(self, namespace: str, fingerprint: int) -> Optional[Dict]:
+        """Return a copy of the result stored under the closest fingerprint above the threshold"""
+        now = time.monotonic()
+        best_result = None
+        best_similarity = self.threshold
+        for entry_namespace, entry_fingerprint, expires_at, result in self._entries:
+            if entry_namespace != namespace or expires_at < now:
+                continue
+            similarity = 1 - (entry_fingerprint ^ fingerprint).bit_count() / 64
+            if similarity >= best_similarity:
+                best_result, best_similarity = result, similarity
+
+        return dict(best_result) if best_result is not None else None
+
+    def add(self, namespace: str, fingerprint: int, result: Dict) -> None:
+        """Store a result under its text fingerprint, dropping the oldest beyond maxsize"""
+        self._entries.append((namespace, fingerprint, time.monotonic() + self.ttl_seconds, dict(result)))
+        if len(self._entries) > self.maxsize:
+            del self._entries[0]
+
+
+def create_cache(threshold: float = DEFAULT_THRESHOLD, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 maxsize: int = 1000) -> NearDuplicateCache:
+    """Embedding cache when sentence-transformers is installed, SimHash cache otherwise"""
+    if EMBEDDINGS_AVAILABLE:
+        return SemanticCache(threshold=threshold, maxsize=maxsize, ttl_seconds=ttl_seconds)
+    return SimHashCache(threshold=threshold, maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+
+# One instance per process: the page and LLM tiers share a single model and each request's fingerprint
+SHARED_CACHE_MAXSIZE = 2000
+_shared_cache: Optional[NearDuplicateCache] = None
+
+
+def shared_cache() -> NearDuplicateCache:
+    """Process-wide cache; callers keep their entries apart by namespace"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = create_cache(maxsize=SHARED_CACHE_MAXSIZE)
+    return _shared_cache
@@ -4,7 +4,10 @@ Test suite for Affiliate Scanner - Fixed version
 
 import unittest
 import re
+from unittest import mock
 from affiliate_scanner import find_affiliate_links, AffiliateScanner
+import affiliate_scanner
+import affiliate_scanner_v2
 
 # Simple dependency check since it might not be in the main module
 def check_dependencies():
@@ -29,32 +32,33 @@ def check_dependencies():
 
 class TestAffiliateScanner(unittest.TestCase):
 
-    def setUp(self):
-        """Set up test cases"""
-        self.scanner = AffiliateScanner()
+    @classmethod
+    def setUpClass(cls):
+        """Set up the scanner and test cases once, scanning leaves them unchanged"""
+        cls.scanner = AffiliateScanner()
 
         # Test HTML templates
-        self.amazon_html = """
+        cls.amazon_html = """
         <html>
             <a href="https://www.amazon.com/dp/B08N5WRWNW?tag=myaffiliate-20&psc=1">Product</a>
             <a href="https://amzn.to/3abc123">Short Link</a>
         </html>
         """
 
-        self.shareasale_html = """
+        cls.shareasale_html = """
         <html>
             <a href="https://www.shareasale.com/r.cfm?m=12345&u=567">ShareASale Link</a>
         </html>
         """
 
-        self.cj_html = """
+        cls.cj_html = """
         <html>
             <a href="https://www.anrdoezrs.net/click-12345">CJ Link 1</a>
             <img src="https://dpbolvw.net/image-12345.jpg">
         </html>
         """
 
-        self.mixed_html = """
+        cls.mixed_html = """
         <html>
             <a href="https://www.amazon.com/dp/B08N5WRWNW?tag=test-20">Amazon</a>
             <a href="https://shareasale.com/r.cfm?m=1111">ShareASale</a>
@@ -63,7 +67,7 @@ class TestAffiliateScanner(unittest.TestCase):
         </html>
         """
 
-        self.clean_html = """
+        cls.clean_html = """
         <html>
             <a href="https://example.com/page1">Regular Link 1</a>
             <a href="https://google.com/search?q=test">Regular Link 2</a>
@@ -122,6 +126,22 @@ class TestAffiliateScanner(unittest.TestCase):
         self.assertEqual(result['total_affiliate_links'], 0)
         print("✓ Clean HTML detection working")
 
+    def test_clean_html_fast_path(self):
+        """Test that the literal-domain check keeps HTML without affiliate domains away from both scan engines"""
+        scanner = self.scanner
+        with mock.patch.object(scanner, '_scan_with_regex', wraps=scanner._scan_with_regex) as regex_scan, \
+                mock.patch.object(scanner, '_scan_with_hyperscan', wraps=scanner._scan_with_hyperscan) as hs_scan:
+            clean_result = scanner.find_affiliate_links(self.clean_html)
+            self.assertEqual(regex_scan.call_count + hs_scan.call_count, 0)
+
+            # Pages with an affiliate domain still go through exactly one scan
+            amazon_result = scanner.find_affiliate_links(self.amazon_html)
+            self.assertEqual(regex_scan.call_count + hs_scan.call_count, 1)
+
+        self.assertFalse(clean_result['affiliate_links_found'])
+        self.assertTrue(amazon_result['affiliate_links_found'])
+        print("✓ Clean HTML fast path working")
+
     def test_empty_content(self):
         """Test empty HTML content"""
         result = find_affiliate_links("")
@@ -130,6 +150,18 @@ class TestAffiliateScanner(unittest.TestCase):
         self.assertEqual(result['total_affiliate_links'], 0)
         print("✓ Empty content handling working")
 
+    def test_result_shape(self):
+        """Test that empty, clean and affiliate results have the same keys, with and without debug output"""
+        for include_debug in (False, True):
+            shapes = [
+                set(self.scanner.find_affiliate_links(html, include_debug=include_debug))
+                for html in ("", self.clean_html, self.amazon_html)
+            ]
+            self.assertEqual(shapes[0], shapes[1])
+            self.assertEqual(shapes[0], shapes[2])
+            self.assertEqual('all_affiliate_links' in shapes[0], include_debug)
+        print("✓ Result shape working")
+
     def test_sample_urls_limit(self):
         """Test that sample URLs are limited to 5"""
         # Create HTML with more than 5 affiliate links
@@ -142,6 +174,210 @@ class TestAffiliateScanner(unittest.TestCase):
         self.assertLessEqual(len(result['details']), 5)
         print("✓ Sample URL limiting working")
 
+    def test_stream_chunks(self):
+        """Test that chunked HTML gives the same result as the whole document"""
+        chunks = [self.mixed_html[i:i + 16] for i in range(0, len(self.mixed_html), 16)]
+        result = self.scanner.find_affiliate_links_in_stream(chunks)
+        expected = self.scanner.find_affiliate_links(self.mixed_html)
+
+        self.assertEqual(result['total_affiliate_links'], expected['total_affiliate_links'])
+        self.assertEqual(sorted(result['affiliate_networks']), sorted(expected['affiliate_networks']))
+        print("✓ Stream scanning working")
+
+    def test_stream_url_split_across_chunks(self):
+        """Test that a URL split across a chunk boundary is found whole"""
+        url = 'https://www.amazon.com/dp/B08N5WRWNW?tag=myaffiliate-20'
+        html = f'<html><a href="{url}">Product</a></html>'
+        split = html.index('?tag=')
+        chunks = [html[:split], html[split:split + 3], html[split + 3:]]
+
+        result = self.scanner.find_affiliate_links_in_stream(chunks)
+        expected = self.scanner.find_affiliate_links(html)
+
+        self.assertEqual(result['total_affiliate_links'], expected['total_affiliate_links'])
+        self.assertEqual(sorted(result['details']), sorted(expected['details']))
+        self.assertIn(url, result['details'])
+        print("✓ Stream chunk boundary working")
+
+    def test_nested_hyperscan_matches_dropped(self):
+        """Test that Hyperscan spans nested inside an earlier match are dropped, as with finditer"""
+        spans = {0: (0, 50), 10: (1, 30), 49: (2, 55), 60: (0, 70)}
+
+        self.assertEqual(list(AffiliateScanner._outermost_spans(spans)), [(0, 0, 50), (60, 0, 70)])
+        print("✓ Nested match filtering working")
+
+    @unittest.skipUnless(affiliate_scanner.HYPERSCAN_AVAILABLE, "hyperscan is not installed")
+    def test_stream_scans_chunks_without_joining(self):
+        """Test that with Hyperscan the chunks are matched as they arrive instead of joined into one document"""
+        chunks = [self.mixed_html[i:i + 16] for i in range(0, len(self.mixed_html), 16)]
+        scanner = self.scanner
+        with mock.patch.object(scanner, 'find_affiliate_links', wraps=scanner.find_affiliate_links) as whole_scan, \
+                mock.patch.object(scanner, '_scan_stream_with_hyperscan',
+                                  wraps=scanner._scan_stream_with_hyperscan) as stream_scan:
+            result = scanner.find_affiliate_links_in_stream(chunks)
+
+        self.assertEqual(whole_scan.call_count, 0)
+        self.assertEqual(stream_scan.call_count, 1)
+        self.assertTrue(result['affiliate_links_found'])
+        print("✓ Hyperscan stream scanning working")
+
+    def test_match_stays_inside_url(self):
+        """Test that a match never runs past the end of an unquoted URL into the following tags and text"""
+        html = '<a href=https://shareasale.com/foo>link</a> some text ?r=123'
+        result = find_affiliate_links(html)
+
+        self.assertFalse(result['affiliate_links_found'])
+        self.assertEqual(result['details'], [])
+        print("✓ Match boundaries working")
+
+    def test_scan_batch(self):
+        """Test that batch scanning returns one result per document in order"""
+        results = self.scanner.scan_batch([self.amazon_html, self.clean_html, self.cj_html])
+
+        self.assertEqual(len(results), 3)
+        self.assertIn('Amazon Associates', results[0]['affiliate_networks'])
+        self.assertFalse(results[1]['affiliate_links_found'])
+        self.assertIn('CJ Affiliate', results[2]['affiliate_networks'])
+        print("✓ Batch scanning working")
+
+
+class TestAffiliateScannerV2(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the v2 scanner once, scanning leaves it unchanged"""
+        cls.scanner = affiliate_scanner_v2.AffiliateScanner()
+
+        # Padding that pushes a document over the direct-scan threshold
+        cls.padding = "<p>filler</p>" * (affiliate_scanner_v2.AffiliateScanner.DIRECT_SCAN_MIN_LENGTH // 10)
+
+    def test_entity_encoded_query_separator(self):
+        """Test that &amp; before the tag parameter is detected in small and direct-scanned documents"""
+        link = '<a href="https://www.amazon.com/dp/X?th=1&amp;tag=abc-20">Product</a>'
+
+        for html in (link, link + self.padding):
+            result = self.scanner.find_affiliate_links(html)
+            self.assertEqual(result['total_affiliate_links'], 1)
+            self.assertEqual(result['details'], ['https://www.amazon.com/dp/X?th=1&tag=abc-20'])
+        print("✓ v2 entity-encoded separator working")
+
+
+    def test_match_stays_inside_url(self):
+        """Test that a direct-scan match never runs past an unquoted URL into the following tags and text"""
+        html = '<a href=https://shareasale.com/foo>link</a> some text ?r=123' + self.padding
+        result = self.scanner.find_affiliate_links(html)
+
+        self.assertFalse(result['affiliate_links_found'])
+        print("✓ v2 match boundaries working")
+
+    def test_network_subset(self):
+        """Test that a scanner built for some networks only reports those networks"""
+        html = """
+        <a href="https://www.amazon.com/dp/B08N5WRWNW?tag=test-20">Amazon</a>
+        <a href="https://shareasale.com/r.cfm?m=1111">ShareASale</a>
+        """
+        scanner = affiliate_scanner_v2.AffiliateScanner(networks=['shareasale'])
+
+        for document in (html, html + self.padding):
+            result = scanner.find_affiliate_links(document)
+            self.assertEqual(result['affiliate_networks'], ['ShareASale'])
+            self.assertEqual(result['total_affiliate_links'], 1)
+
+        # Pages with only unselected networks take the literal-domain fast path
+        result = scanner.find_affiliate_links('<a href="https://amzn.to/3abc123">Short Link</a>')
+        self.assertFalse(result['affiliate_links_found'])
+
+        with self.assertRaises(ValueError):
+            affiliate_scanner_v2.AffiliateScanner(networks=['shareasale', 'unknown'])
+        with self.assertRaises(ValueError):
+            affiliate_scanner_v2.AffiliateScanner(networks=[])
+        print("✓ v2 network subset working")
+
+    def test_duplicate_spellings_counted_once(self):
+        """Test that &amp; and & spellings of one link count as a single link"""
+        html = """
+        <a href="https://www.amazon.com/dp/X?th=1&amp;tag=abc-20">Product</a>
+        <a href="https://www.amazon.com/dp/X?th=1&tag=abc-20">Product</a>
+        <a href=" https://www.amazon.com/dp/X?th=1&tag=abc-20 ">Product</a>
+        """
+
+        for document in (html, html + self.padding):
+            result = self.scanner.find_affiliate_links(document)
+            self.assertEqual(result['total_affiliate_links'], 1)
+            self.assertEqual(result['details'], ['https://www.amazon.com/dp/X?th=1&tag=abc-20'])
+        print("✓ v2 duplicate spellings working")
+
+    def test_direct_scan_threshold(self):
+        """Test that documents switch to the direct scan at DIRECT_SCAN_MIN_LENGTH with the same links found"""
+        link = '<a href="https://www.anrdoezrs.net/click-12345">CJ Link</a>'
+        large_html = link + self.padding
+        self.assertGreaterEqual(len(large_html), affiliate_scanner_v2.AffiliateScanner.DIRECT_SCAN_MIN_LENGTH)
+
+        small = self.scanner.find_affiliate_links(link)
+        large = self.scanner.find_affiliate_links(large_html)
+        inventory = self.scanner.find_affiliate_links(large_html, extract_all_links=True)
+
+        self.assertNotEqual(small['parsing_method'], 'direct_scan')
+        self.assertEqual(large['parsing_method'], 'direct_scan')
+        self.assertNotEqual(inventory['parsing_method'], 'direct_scan')
+        for result in (large, inventory):
+            self.assertEqual(result['details'], small['details'])
+            self.assertEqual(result['affiliate_networks'], ['CJ Affiliate'])
+        print("✓ v2 direct scan threshold working")
+
+    def test_same_result_at_every_size(self):
+        """Test that small and direct-scanned documents apply the same matching rules"""
+        html = """
+        <p>Visit https://amzn.to/abc123 for the deal</p>
+        <script>var link = "https://shareasale.com/r.cfm?m=1111";</script>
+        <a href="https://example.com/out?next=https://www.anrdoezrs.net/click-12345">CJ Link</a>
+        <a href="https://www.amazon.com/dp/X?tag=abc-20">Product</a>
+        """
+        small = self.scanner.find_affiliate_links(html)
+        large = self.scanner.find_affiliate_links(html + self.padding)
+
+        self.assertEqual(large['parsing_method'], 'direct_scan')
+        self.assertEqual(sorted(large['affiliate_networks']), sorted(small['affiliate_networks']))
+        self.assertEqual(large['total_affiliate_links'], small['total_affiliate_links'])
+        self.assertEqual(sorted(large['details']), sorted(small['details']))
+        self.assertEqual(sorted(small['affiliate_networks']), ['Amazon Associates', 'CJ Affiliate'])
+        print("✓ v2 size-independent matching working")
+
+    def test_match_networks_shared_buffer(self):
+        """Test that matching links in one shared buffer agrees with matching each link on its own"""
+        links = [
+            'https://example.com/regular',
+            'https://www.amazon.com/dp/B08N5WRWNW?tag=test-20',
+            'https://example.com/?next=https://amzn.to/3abc123',
+            'https://shareasale.com/r.cfm?m=1111',
+            'https://example.com/page?tag=123'
+        ]
+        expected = [hit for hit in map(self.scanner._match_network, links) if hit]
+
+        network_hits, url_hits = self.scanner._match_networks(links)
+
+        self.assertEqual(list(zip(network_hits, url_hits)), expected)
+        # A quote inside a link falls back to matching link by link
+        quoted_links = links + ['https://example.com/"quoted"']
+        self.assertEqual(list(zip(*self.scanner._match_networks(quoted_links))), expected)
+        print("✓ v2 shared buffer matching working")
+
+    def test_find_affiliate_links_batch(self):
+        """Test that batch scanning returns the single-document result for each document in order"""
+        documents = [
+            '<a href="https://amzn.to/3abc123">Short Link</a>',
+            '<a href="https://example.com/page1">Regular Link</a>',
+            '<a href="https://www.anrdoezrs.net/click-12345">CJ Link</a>' + self.padding
+        ]
+
+        results = affiliate_scanner_v2.find_affiliate_links_batch(documents, workers=2, use_threads=True)
+
+        self.assertEqual(results, [affiliate_scanner_v2.find_affiliate_links(html) for html in documents])
+        self.assertEqual(results[0]['affiliate_networks'], ['Amazon Associates'])
+        self.assertFalse(results[1]['affiliate_links_found'])
+        self.assertEqual(results[2]['parsing_method'], 'direct_scan')
+        print("✓ v2 batch scanning working")
+
 
 def run_comprehensive_test():
     """Run a comprehensive visual test"""
@@ -1,5 +1,17 @@
 import requests
+import gzip
 import json
+import time
+
+
+def post_json(url, data):
+    """POST a JSON body gzip-compressed, the HTML in it shrinks several times over"""
+    return requests.post(
+        url,
+        data=gzip.compress(json.dumps(data).encode("utf-8")),
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"}
+    )
+
 
 # Test data
 test_data = {
@@ -16,12 +28,43 @@ test_data = {
     """
 }
 
-# Send request
-response = requests.post(
-    "http://localhost:8000/analyze",
-    json=test_data
-)
+# Pages to analyze, sent together in one batch
+items = [test_data]
 
+# Queue the batch
+response = post_json("http://localhost:8000/analyze/batch", {"items": items})
+batch = response.json()
 print("Status Code:", response.status_code)
+print(f"Batch {batch['batch_id']}: {batch['status']}")
+
+# Poll until every item is analyzed
+while batch["status"] != "PROCESSED":
+    time.sleep(1)
+    batch = requests.get(f"http://localhost:8000/batch/{batch['batch_id']}").json()
+    print(f"Batch {batch['batch_id']}: {batch['status']}")
+
 print("Response:")
-print(json.dumps(response.json(), indent=2))
\ No newline at end of file
+print(json.dumps(batch["results"], indent=2))
+
+# The same page twice: the repeat should come straight from the exact page cache
+# (the batch above already analyzed it, so use a copy the server has not seen yet)
+single_data = dict(test_data, html_content=test_data["html_content"] + f"<!-- {time.time()} -->")
+for attempt in ("first", "repeat"):
+    response = post_json("http://localhost:8000/analyze", single_data)
+    print(f"Single analysis ({attempt}): X-Cache {response.headers.get('X-Cache')}, cache {response.json()['cache']}")
+    assert response.json()["cache"]["exact"] is (attempt == "repeat"), "Exact page cache reported wrongly"
+
+assert response.headers.get("X-Cache") == "HIT", "Repeat analysis missed the cache"
+
+# A small gzip body that expands past the server's decompressed-size cap (32 MB) must be refused, not inflated
+oversized_html = " " * (33 * 1024 * 1024)
+bomb = gzip.compress(json.dumps({"url": "https://example.com", "html_content": oversized_html}).encode("utf-8"))
+print(f"Oversized body: {len(bomb)} bytes compressed")
+for endpoint in ("/analyze", "/analyze/batch"):
+    response = requests.post(
+        f"http://localhost:8000{endpoint}",
+        data=bomb,
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"}
+    )
+    print(f"Oversized body to {endpoint}: status code {response.status_code}")
+    assert response.status_code == 413, f"Oversized gzip body to {endpoint} was not rejected"
@@ -0,0 +1,230 @@
+"""
+Test suite for LLM Analysis batching, provider retries and caching
+"""
+
+import asyncio
+import json
+import unittest
+from collections import OrderedDict
+from unittest import mock
+
+# llm_analysis needs requests, skip these tests where it is not installed
+try:
+    import llm_analysis
+except ImportError:
+    llm_analysis = None
+
+
+@unittest.skipIf(llm_analysis is None, "llm_analysis dependencies are not installed")
+class TestLLMBatching(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an analysis the fake provider returns for every document"""
+        self.analysis = {
+            "disclosure_found": True,
+            "disclosure_location": "beginning",
+            "content_intent": "informative",
+            "confidence_score": 0.9,
+            "reasoning": "Disclosure in the first paragraph"
+        }
+
+    def fake_call_provider(self, prompts):
+        """Fake call_provider recording each prompt and answering one analysis per document"""
+        def call_provider(prompt, provider_name=None, max_tokens=1000, schema_name='analysis'):
+            prompts.append(prompt)
+            if schema_name == 'analysis_batch':
+                return json.dumps({"results": [self.analysis] * prompt.count('<<<END>>>')})
+            return json.dumps(self.analysis)
+
+        return call_provider
+
+    def test_split_by_token_budget(self):
+        """Test that groups stay within the budget and keep every item in order"""
+        texts = ["word " * 40, "word " * 40, "word " * 40, "word " * 90]
+        items = [(text, None, None) for text in texts]
+        budget = max(llm_analysis._estimate_tokens(text) for text in texts) + 1
+
+        groups = llm_analysis._split_by_token_budget(items, budget)
+
+        self.assertEqual([item for group in groups for item in group], items)
+        for group in groups:
+            self.assertLessEqual(sum(llm_analysis._estimate_tokens(text) for text, _, _ in group), budget)
+        print("✓ Token budget grouping working")
+
+    def test_batched_prompt_within_budget(self):
+        """Test that a full batch is split so no request carries more than the input budget of page text"""
+        texts = [f"page {i} " + "word " * 200 for i in range(llm_analysis.LLM_BATCH_MAX_SIZE)]
+        budget = 2 * llm_analysis._estimate_tokens(texts[0])
+        prompts = []
+
+        async def run_batch():
+            batcher = llm_analysis.LLMBatcher()
+            batcher.start()
+            try:
+                return await asyncio.gather(*(batcher.submit(text) for text in texts))
+            finally:
+                await batcher.stop()
+
+        client = llm_analysis._CLIENT
+        with mock.patch.object(client, 'input_budget', return_value=budget), \
+                mock.patch.object(client, 'call_provider', side_effect=self.fake_call_provider(prompts)):
+            results = asyncio.run(run_batch())
+
+        self.assertEqual(results, [self.analysis] * len(texts))
+        self.assertGreater(len(prompts), 1)
+        for prompt in prompts:
+            documents = [text for text in texts if text in prompt]
+            self.assertLessEqual(sum(llm_analysis._estimate_tokens(text) for text in documents), budget)
+        print("✓ Batched prompt budget working")
+
+
+class FakeResponse:
+    """Stand-in for a requests response, streamed or plain"""
+
+    def __init__(self, status_code=200, content='', headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = content
+        body = {"choices": [{"message": {"content": content}}]}
+        self.content = json.dumps(body).encode('utf-8')
+        delta = {"choices": [{"delta": {"content": content}}]}
+        self.lines = [b'data: ' + json.dumps(delta).encode('utf-8'), b'data: [DONE]']
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FakeSession:
+    """Session answering each provider from its own queue of responses, the last one repeating"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.posted = []
+
+    def post(self, url, **kwargs):
+        name = next(name for name in self.responses if name in url)
+        self.posted.append(name)
+        queue = self.responses[name]
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+
+
+@unittest.skipIf(llm_analysis is None, "llm_analysis dependencies are not installed")
+class TestLLMProviders(unittest.TestCase):
+
+    def setUp(self):
+        """Give every test both providers, no cooldowns and no sleeping between retries"""
+        patches = [
+            mock.patch.dict('os.environ', {'DEEPSEEK_API_KEY': 'test-key', 'GROQ_API_KEY': 'test-key'}),
+            mock.patch.dict(llm_analysis._PROVIDER_COOLDOWNS, clear=True),
+            mock.patch.object(llm_analysis.time, 'sleep')
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.answer = '{"ok": true}'
+
+    def test_retry_after_sets_cooldown(self):
+        """A 429 with a long Retry-After puts the provider in cooldown and later calls skip it"""
+        session = FakeSession({
+            'deepseek': [FakeResponse(429, 'rate limited', {'Retry-After': '120'})],
+            'groq': [FakeResponse(200, self.answer)]
+        })
+        client = llm_analysis.FreeLLMClient(session=session)
+
+        self.assertEqual(client.call_provider('prompt', 'deepseek'), self.answer)
+        self.assertEqual(session.posted, ['deepseek', 'groq'])
+        remaining = llm_analysis._PROVIDER_COOLDOWNS['deepseek'] - llm_analysis.time.monotonic()
+        self.assertGreater(remaining, 100)
+
+        self.assertEqual(client.call_provider('prompt', 'deepseek'), self.answer)
+        self.assertEqual(session.posted, ['deepseek', 'groq', 'groq'])
+        print("✓ Retry-After cooldown working")
+
+    def test_retries_are_capped(self):
+        """A provider that keeps failing transiently is tried a bounded number of times"""
+        with mock.patch.dict('os.environ', {'GROQ_API_KEY': ''}):
+            session = FakeSession({'deepseek': [FakeResponse(503, 'overloaded')]})
+            client = llm_analysis.FreeLLMClient(session=session)
+
+            with self.assertRaises(llm_analysis.LLMAnalysisError):
+                client.call_provider('prompt')
+
+        self.assertEqual(len(session.posted), llm_analysis.MAX_ATTEMPTS_PER_PROVIDER)
+        self.assertEqual(llm_analysis.time.sleep.call_count, llm_analysis.MAX_ATTEMPTS_PER_PROVIDER - 1)
+        for call in llm_analysis.time.sleep.call_args_list:
+            self.assertLessEqual(call.args[0], llm_analysis.RETRY_MAX_DELAY_SECONDS)
+        print("✓ Retry cap working")
+
+    def test_stream_ignores_braces_in_strings(self):
+        """The streamed object ends at its closing brace, not at braces or quotes inside strings"""
+        answer = '{"reasoning": "a } and { with \\"quotes\\"", "nested": {"depth": 2}}'
+        deltas = [answer[:15], answer[15:30], answer[30:] + ' trailing text']
+
+        def lines():
+            for delta in deltas:
+                yield b'data: ' + json.dumps({"choices": [{"delta": {"content": delta}}]}).encode('utf-8')
+            raise AssertionError("read past the end of the JSON object")
+
+        content = llm_analysis.FreeLLMClient._read_json_stream(lines())
+
+        self.assertEqual(content, answer)
+        self.assertEqual(json.loads(content)['nested'], {"depth": 2})
+        print("✓ JSON stream reading working")
+
+
+@unittest.skipIf(llm_analysis is None, "llm_analysis dependencies are not installed")
+class TestLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        """Give every test an empty cache holding two entries"""
+        patches = [
+            mock.patch.object(llm_analysis, '_llm_cache', OrderedDict()),
+            mock.patch.object(llm_analysis, 'LLM_CACHE_MAXSIZE', 2)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_entries_expire(self):
+        """Entries older than the TTL are dropped on lookup"""
+        with mock.patch.object(llm_analysis.time, 'monotonic', return_value=1000.0):
+            llm_analysis._llm_cache_set('page', {'result': 1})
+            self.assertEqual(llm_analysis._llm_cache_get('page'), {'result': 1})
+
+        with mock.patch.object(llm_analysis.time, 'monotonic',
+                               return_value=1001.0 + llm_analysis.LLM_CACHE_TTL_SECONDS):
+            self.assertIsNone(llm_analysis._llm_cache_get('page'))
+        self.assertNotIn('page', llm_analysis._llm_cache)
+        print("✓ LLM cache expiry working")
+
+    def test_least_recently_used_is_evicted(self):
+        """Beyond the size limit the entry read longest ago goes first"""
+        llm_analysis._llm_cache_set('first', {'result': 1})
+        llm_analysis._llm_cache_set('second', {'result': 2})
+        llm_analysis._llm_cache_get('first')
+        llm_analysis._llm_cache_set('third', {'result': 3})
+
+        self.assertIsNone(llm_analysis._llm_cache_get('second'))
+        self.assertEqual(llm_analysis._llm_cache_get('first'), {'result': 1})
+        self.assertEqual(llm_analysis._llm_cache_get('third'), {'result': 3})
+        print("✓ LLM cache eviction working")
+
+    def test_results_are_copies(self):
+        """Changing a returned analysis leaves the cached one intact"""
+        llm_analysis._llm_cache_set('page', {'result': 1})
+        llm_analysis._llm_cache_get('page')['cache_hit'] = True
+        self.assertEqual(llm_analysis._llm_cache_get('page'), {'result': 1})
+        print("✓ LLM cache copies working")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,31 +1,74 @@
 import requests
+import gzip
 import json
+import time
+
+from truthsignal_cache import DiskCache, cache_key
+
+# Fetched pages and results are kept on disk, so a re-run skips the network and the LLM
+cache = DiskCache()
+
+# Pages to analyze, fetched first and then sent together in one batch
+urls = ["https://www.nytimes.com/wirecutter/gifts/personalized/"]
+
+
+def post_json(url, data):
+    """POST a JSON body gzip-compressed, the page HTML shrinks several times over"""
+    return requests.post(
+        url,
+        data=gzip.compress(json.dumps(data).encode("utf-8")),
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"}
+    )
+
+
+def run_batch(items):
+    """Queue a batch of pages and poll until every page is analyzed"""
+    batch_response = post_json("http://localhost:8000/analyze/batch", {"items": items})
+    batch = batch_response.json()
+    print(f"Queued batch {batch['batch_id']} ({len(items)} pages), status code: {batch_response.status_code}")
+
+    while batch["status"] != "PROCESSED":
+        time.sleep(1)
+        batch = requests.get(f"http://localhost:8000/batch/{batch['batch_id']}").json()
+        print(f"Batch status: {batch['status']}")
+
+    return batch["results"]
 
-# First, let's fetch the NYTimes page content
-url = "https://www.nytimes.com/wirecutter/gifts/personalized/"
 
 try:
-    # Fetch the page
-    response = requests.get(url)
-    html_content = response.text
+    items = []
+    for url in urls:
+        # Fetch the page
+        html_content = cache.get_or_compute(cache_key("page", url), lambda: requests.get(url).text)
 
-    print(f"Fetched page: {len(html_content)} characters")
+        print(f"Fetched page: {len(html_content)} characters")
+
+        items.append({
+            "url": url,
+            "html_content": html_content
+        })
 
     # Send to our analysis API
-    analysis_data = {
-        "url": url,
-        "html_content": html_content
-    }
-
-    analysis_response = requests.post(
-        "http://localhost:8000/analyze",
-        json=analysis_data
-    )
+    analysis_key = cache_key("analysis", *(part for item in items for part in (item["url"], item["html_content"])))
+    results = cache.get(analysis_key)
+    from_disk = results is not None
+    if from_disk:
+        print("Analysis results loaded from the disk cache")
+    else:
+        results = run_batch(items)
+        cache.set(analysis_key, results)
 
     print("\n=== Analysis Results ===")
-    print(f"Status Code: {analysis_response.status_code}")
-    print("Response:")
-    print(json.dumps(analysis_response.json(), indent=2))
+    for url, result in zip(urls, results):
+        print(f"\n{url}")
+        print(json.dumps(result, indent=2))
+
+    # The same pages again should be served from the server's analysis cache; only checked after a fresh
+    # analysis, a disk-cached run may talk to a restarted server that would have to call the LLM again
+    if not from_disk:
+        repeat_results = run_batch(items)
+        assert all(result["cache_hit"] for result in repeat_results), "Repeat analysis missed the cache"
+        print("\n✅ Repeat analysis served from cache")
 
 except Exception as e:
-    print(f"Error: {e}")
\ No newline at end of file
+    print(f"Error: {e}")
@@ -0,0 +1,159 @@
+"""
+Test suite for Score Aggregator
+"""
+
+import itertools
+import unittest
+from unittest import mock
+
+import score_aggregator
+from score_aggregator import (
+    INTENT_CODES, LOCATION_CODES, AffiliateResult, LLMResult, calculate_trust_score, calculate_trust_score_batch
+)
+
+COUNTS = (0, 1, 2, 3, 4, 5, 6, 9)
+LOCATIONS = ('beginning', 'middle', 'end', 'nowhere')
+INTENTS = ('informative', 'persuasive', 'mixed')
+
+
+def reference_score(affiliate_count, disclosure_found, disclosure_location, content_intent):
+    """The red/yellow/green rules written out as plain conditions"""
+    red = []
+    if affiliate_count > 3 and not disclosure_found:
+        red.append(f"High number of affiliate links ({affiliate_count}) with no disclosure")
+    if content_intent == "persuasive" and not disclosure_found:
+        red.append('Persuasive sales content with no disclosure')
+    if affiliate_count > 5:
+        red.append(f"Very high number of affiliate links ({affiliate_count})")
+    if red:
+        return 'red', red
+
+    yellow = []
+    if 1 <= affiliate_count <= 3 and not disclosure_found:
+        yellow.append(f"Medium affiliate links ({affiliate_count}) with no disclosure")
+    if content_intent == "mixed" and not disclosure_found:
+        yellow.append('Mixed content intent with no disclosure')
+    if affiliate_count > 0 and disclosure_found and disclosure_location in ['middle', 'end']:
+        yellow.append(f'Affiliate links with disclosure at {disclosure_location} (not beginning)')
+    if yellow:
+        return 'yellow', yellow
+
+    green = []
+    if affiliate_count == 0:
+        green.append('No affiliate links detected')
+    if disclosure_found and disclosure_location == 'beginning':
+        green.append(f'Clear disclosure at beginning with {affiliate_count} affiliate links')
+    if not green:
+        green.append('Minimal risk factors detected')
+    return 'green', green
+
+
+def all_cases():
+    """Every combination of the four inputs the score depends on"""
+    return list(itertools.product(COUNTS, (False, True), LOCATIONS, INTENTS))
+
+
+class TestScoreAggregator(unittest.TestCase):
+
+    def test_matches_reference_rules(self):
+        """Every input combination scores as the plain rules do, from dicts and dataclasses"""
+        for count, disclosed, location, intent in all_cases():
+            expected_score, expected_reasons = reference_score(count, disclosed, location, intent)
+            affiliate_data = {'affiliate_links_count': count, 'affiliate_domains': ['amazon.com']}
+            llm_data = {'disclosure_found': disclosed, 'disclosure_location': location, 'content_intent': intent}
+
+            for affiliate_input, llm_input in (
+                    (affiliate_data, llm_data),
+                    (AffiliateResult.from_dict(affiliate_data), LLMResult.from_dict(llm_data))):
+                with self.subTest(count=count, disclosed=disclosed, location=location, intent=intent,
+                                  dataclass=isinstance(affiliate_input, AffiliateResult)):
+                    result = calculate_trust_score(affiliate_input, llm_input)
+                    self.assertEqual(result['trust_score'], expected_score)
+                    self.assertEqual(result['reasons'], expected_reasons)
+        print("✓ Trust score rules working")
+
+    def test_missing_fields_take_defaults(self):
+        """Empty payloads score as no links, no disclosure and informative content"""
+        result = calculate_trust_score({}, {})
+        self.assertEqual((result['trust_score'], result['reasons']), reference_score(0, False, 'nowhere', 'informative'))
+        print("✓ Scoring defaults working")
+
+    def test_reasons_are_not_shared(self):
+        """Callers may extend the reasons without changing later results"""
+        first = calculate_trust_score({'affiliate_links_count': 4}, {})
+        first['reasons'].append('extra')
+        second = calculate_trust_score({'affiliate_links_count': 4}, {})
+        self.assertNotIn('extra', second['reasons'])
+        print("✓ Independent reasons working")
+
+    def check_batch(self):
+        """Batch scores match the scalar scores for every input combination"""
+        cases = all_cases()
+        batch = calculate_trust_score_batch(
+            [count for count, _, _, _ in cases],
+            [disclosed for _, disclosed, _, _ in cases],
+            [LOCATION_CODES[location] for _, _, location, _ in cases],
+            [INTENT_CODES[intent] for _, _, _, intent in cases]
+        )
+        expected = [
+            calculate_trust_score(
+                {'affiliate_links_count': count},
+                {'disclosure_found': disclosed, 'disclosure_location': location, 'content_intent': intent},
+                include_analysis=False
+            )['trust_score']
+            for count, disclosed, location, intent in cases
+        ]
+        self.assertEqual(list(batch['trust_score']), expected)
+        self.assertEqual([('green', 'yellow', 'red')[code] for code in batch['score_code']], expected)
+
+    @unittest.skipUnless(score_aggregator.NUMPY_AVAILABLE, "numpy not installed")
+    def test_batch_matches_scalar_numpy(self):
+        """Vectorized batch scoring agrees with calculate_trust_score"""
+        self.check_batch()
+        print("✓ Batch scoring with numpy working")
+
+    def test_batch_matches_scalar_without_numpy(self):
+        """List batch scoring agrees with calculate_trust_score"""
+        with mock.patch.object(score_aggregator, 'NUMPY_AVAILABLE', False):
+            self.check_batch()
+        print("✓ Batch scoring without numpy working")
+
+    def test_batch_unknown_codes_match_no_rule(self):
+        """Codes outside the tables score like unknown strings"""
+        with mock.patch.object(score_aggregator, 'NUMPY_AVAILABLE', False):
+            batch = calculate_trust_score_batch([2], [True], [99], [99])
+        scalar = calculate_trust_score(
+            {'affiliate_links_count': 2},
+            {'disclosure_found': True, 'disclosure_location': 'unknown', 'content_intent': 'unknown'}
+        )
+        self.assertEqual(list(batch['trust_score']), [scalar['trust_score']])
+        print("✓ Unknown batch codes working")
+
+    def test_lazy_analysis_matches_eager(self):
+        """The deferred summary renders the same text as the eager one"""
+        for count, disclosed, location, intent in all_cases():
+            affiliate_data = {'affiliate_links_count': count, 'affiliate_domains': ['a.com', 'b.com', 'c.com', 'd.com']}
+            llm_data = {
+                'disclosure_found': disclosed,
+                'disclosure_location': location,
+                'content_intent': intent,
+                'confidence_score': 0.73,
+                'llm_analysis_raw': 'Short reasoning'
+            }
+            with self.subTest(count=count, disclosed=disclosed, location=location, intent=intent):
+                eager = calculate_trust_score(affiliate_data, llm_data)
+                lazy = calculate_trust_score(affiliate_data, llm_data, lazy_analysis=True)
+                self.assertIsInstance(eager['final_analysis'], str)
+                self.assertEqual(str(lazy['final_analysis']), eager['final_analysis'])
+                self.assertEqual(lazy['final_analysis'], eager['final_analysis'])
+        print("✓ Lazy final analysis working")
+
+    def test_include_analysis_false_omits_summary(self):
+        """Callers that only need the score get no summary"""
+        result = calculate_trust_score({'affiliate_links_count': 1}, {}, include_analysis=False)
+        self.assertNotIn('final_analysis', result)
+        print("✓ Optional final analysis working")
+
+
+if __name__ == "__main__":
+    unittest.main()
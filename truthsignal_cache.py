@@ -0,0 +1,82 @@
+"""
+Disk Cache for TruthSignal
+Keeps fetched pages and analysis results in sqlite so repeated script runs skip the network and the LLM.
+
+Usage: python -m truthsignal_cache clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Callable, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'truthsignal', 'cache.sqlite3')
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def cache_key(*parts: str) -> str:
+    """SHA-256 over the parts, e.g. cache_key('analysis', url, html)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    JSON values in a sqlite table, expired by insertion time
+    Each write is its own transaction, so an interrupted run never leaves a partial entry
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, value BLOB, inserted INT)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value, or None if missing or older than the TTL"""
+        with closing(sqlite3.connect(self.path)) as conn:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND inserted > ?",
+                (key, int(time.time() - self.ttl_seconds))
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value, replacing any previous one"""
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache(key, value, inserted) VALUES (?, ?, ?)",
+                (key, json.dumps(value).encode('utf-8'), int(time.time()))
+            )
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the stored value, or compute and store it"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> int:
+        """Delete every entry, returning how many were removed"""
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            return conn.execute("DELETE FROM cache").rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the TruthSignal disk cache")
+    parser.add_argument("command", choices=["clear"])
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        removed = DiskCache(args.path).clear()
+        print(f"Removed {removed} cached entries from {args.path}")